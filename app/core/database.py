@@ -1,13 +1,51 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from contextlib import asynccontextmanager
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import metrics
 from app.core.config import settings
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator
 
-async_engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True
-)
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    database = "primary"
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.database = self.database
+        return pool
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_checkout_wait.observe(time.perf_counter() - started_at, self.database)
+
+def _create_engine(url: str, database: str) -> AsyncEngine:
+    """Creates an instrumented engine with the pool and prepared statement cache settings from Settings."""
+    engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE},
+        poolclass=_TimedQueuePool
+    )
+    engine.pool.database = database
+    metrics.instrument_engine(engine, database)
+    return engine
+
+async_engine = _create_engine(settings.DATABASE_URL, "primary")
+# Read-only queries go to DATABASE_READ_URL (e.g. a streaming replica) when it is set.
+read_async_engine = _create_engine(settings.DATABASE_READ_URL, "read") if settings.DATABASE_READ_URL else async_engine
 
 AsyncSessionFactory = sessionmaker(
     bind=async_engine,
@@ -16,12 +54,57 @@ AsyncSessionFactory = sessionmaker(
     future=True
 )
 
+ReadAsyncSessionFactory = sessionmaker(
+    bind=read_async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    future=True
+)
+
 Base = declarative_base()
 
+# After a failed connection to the read database, reads go to the primary until this time.
+read_engine_unavailable_until: float = 0.0
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionFactory() as session:
         try:
             yield session
         except Exception:
             await session.rollback()
-            raise
\ No newline at end of file
+            raise
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Opens a session for read-only queries.
+
+    The session is bound to the read engine, and falls back to the primary when no read
+    URL is configured or a connection to the read database cannot be established. After
+    a failure the read database is skipped for DATABASE_READ_RETRY_SECONDS.
+    """
+    global read_engine_unavailable_until
+    if read_async_engine is async_engine or time.monotonic() < read_engine_unavailable_until:
+        async with AsyncSessionFactory() as session:
+            yield session
+        return
+
+    session = ReadAsyncSessionFactory()
+    try:
+        await session.connection()
+    except (DBAPIError, OSError) as e:
+        print(f"Read database unavailable, using the primary: {e}")
+        read_engine_unavailable_until = time.monotonic() + settings.DATABASE_READ_RETRY_SECONDS
+        await session.close()
+        session = AsyncSessionFactory()
+    async with session:
+        yield session
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for endpoints that only read; see read_session()."""
+    async with read_session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
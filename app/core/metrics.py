@@ -0,0 +1,194 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter, one value per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    """
+    Histogram with fixed buckets, one series per combination of label values.
+
+    Only the per-bucket counts are stored; they are made cumulative when rendered, so an
+    observation costs a bisect and three additions.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            # [count per bucket (the last one is +Inf), sum]
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (bucket_counts, total) in self.series.items():
+            cumulative = 0
+            for upper_bound, count in zip((*self.buckets, "+Inf"), bucket_counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{upper_bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route", "status")
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "Database queries run while handling an HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent in database queries while handling an HTTP request.", ("route",)
+)
+db_queries = Counter("db_queries_total", "Database queries run.", ("database",))
+db_query_duration = Histogram("db_query_duration_seconds", "Time spent in database queries.", ("database",))
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool.", ("database",)
+)
+product_cache_lookups = Counter(
+    "product_cache_lookups_total", "Product cache lookups by cache and result (fresh, refresh, stale or miss).", ("cache", "result")
+)
+product_api_request_duration = Histogram(
+    "product_api_request_duration_seconds", "Latency of requests to the external product API.", ("endpoint",)
+)
+product_api_errors = Counter(
+    "product_api_errors_total", "Failed requests to the external product API.", ("endpoint", "reason")
+)
+
+REGISTRY = (
+    http_request_duration,
+    http_request_db_queries,
+    http_request_db_duration,
+    db_queries,
+    db_query_duration,
+    db_pool_checkout_wait,
+    product_cache_lookups,
+    product_api_request_duration,
+    product_api_errors,
+)
+
+def render_prometheus() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# [query count, query seconds] of the HTTP request being handled, if any.
+request_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+def instrument_engine(engine: AsyncEngine, database: str) -> None:
+    """Counts and times every query run through the engine, globally and for the current request."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        db_queries.inc(database)
+        db_query_duration.observe(elapsed, database)
+        usage = request_db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += elapsed
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+def _route_label(scope) -> str:
+    """
+    Path template of the route that handled the request, e.g. /api/v1/clients/{client_id}.
+
+    Built from the request path by putting back the name of each path parameter, which
+    works however the routers were included.
+    """
+    if scope.get("endpoint") is None:
+        return "unmatched"
+    segment_names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    if not segment_names:
+        return scope["path"]
+    return "/".join(
+        "{" + segment_names[segment] + "}" if segment in segment_names else segment
+        for segment in scope["path"].split("/")
+    )
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, database queries and database time of each request.
+
+    Requests are labelled by route template (e.g. /api/v1/clients/{client_id}) rather than
+    by path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        usage = [0, 0.0]
+        token = request_db_usage.set(usage)
+        started_at = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            request_db_usage.reset(token)
+            route_path = _route_label(scope)
+            http_request_duration.observe(elapsed, scope["method"], route_path, str(status_code))
+            http_request_db_queries.observe(usage[0], route_path)
+            http_request_db_duration.observe(usage[1], route_path)
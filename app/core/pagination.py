@@ -0,0 +1,33 @@
+import base64
+import json
+from typing import Any, Dict
+from fastapi import HTTPException, status
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encodes the keyset position of the last returned row into an opaque cursor.
+
+    Args:
+        values: JSON-serializable values identifying the position (e.g. {"i": "<uuid>"}).
+
+    Returns:
+        A URL-safe string to be sent back by the client to fetch the next page.
+    """
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Raises:
+        HTTPException (status_code 400): If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    return values
\ No newline at end of file
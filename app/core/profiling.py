@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.security import authenticate_admin_token
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+PROFILE_HEADER = b"x-profile"
+
+# Where the time of a profiled request went, by the innermost matching frame. Checked in
+# order, so the more specific paths come first.
+PROFILE_CATEGORIES = (
+    ("product_service", f"{os.sep}app{os.sep}services{os.sep}product_service"),
+    ("db", f"{os.sep}sqlalchemy{os.sep}"),
+    ("db", f"{os.sep}asyncpg{os.sep}"),
+    ("crud", f"{os.sep}app{os.sep}crud{os.sep}"),
+    ("router", f"{os.sep}app{os.sep}routers{os.sep}"),
+)
+
+# Only one request is profiled at a time per process, which keeps the overhead bounded.
+profiling_in_progress = False
+
+def _category(file_path: Optional[str]) -> Optional[str]:
+    if not file_path:
+        return None
+    for category, path_part in PROFILE_CATEGORIES:
+        if path_part in file_path:
+            return category
+    return None
+
+def profile_breakdown(root_frame) -> Dict[str, float]:
+    """
+    Splits the time of a profile across router, crud, product_service, db and other.
+
+    The self time of every frame (which includes the time spent awaiting) is attributed
+    to the innermost enclosing frame that belongs to one of PROFILE_CATEGORIES.
+    """
+    breakdown: Dict[str, float] = {}
+    stack = [(root_frame, "other")]
+    while stack:
+        frame, category = stack.pop()
+        category = _category(frame.file_path) or category
+        self_time = frame.time - sum(child.time for child in frame.children)
+        breakdown[category] = breakdown.get(category, 0.0) + max(self_time, 0.0)
+        stack.extend((child, category) for child in frame.children)
+    return {category: round(seconds, 6) for category, seconds in breakdown.items()}
+
+def _requested_by_admin(scope) -> bool:
+    """True if the request asks to be profiled with X-Profile and carries an admin token."""
+    profile_requested = False
+    token = None
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            profile_requested = value not in (b"", b"0")
+        elif name == b"authorization" and value[:7].lower() == b"bearer ":
+            token = value[7:].decode("latin-1")
+    return profile_requested and token is not None and authenticate_admin_token(token) is not None
+
+def _save_profile(profile_id: str, session, breakdown: Optional[Dict[str, float]]) -> None:
+    """Writes the speedscope profile and the per-layer breakdown. Blocking, so it runs in a thread."""
+    os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILING_OUTPUT_DIR, f"{profile_id}.speedscope.json"), "w") as output:
+        output.write(SpeedscopeRenderer().render(session))
+    if breakdown is not None:
+        with open(os.path.join(settings.PROFILING_OUTPUT_DIR, f"{profile_id}.breakdown.json"), "w") as output:
+            json.dump(breakdown, output)
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs a sampling profiler (pyinstrument) around selected requests.
+
+    A request is profiled when an admin sends it with the X-Profile header, or at random
+    with probability PROFILING_SAMPLE_RATE. The profile is saved in PROFILING_OUTPUT_DIR in
+    the speedscope format, which flame graph viewers open, next to a JSON breakdown of the
+    time by layer, and their file name is returned in the X-Profile-Id header. The files are
+    written from a worker thread so the event loop is not blocked. Requests that are not
+    profiled only pay for a header scan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        if profiling_in_progress:
+            return False
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return True
+        return _requested_by_admin(scope)
+
+    async def __call__(self, scope, receive, send):
+        global profiling_in_progress
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiling_in_progress = True
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_SECONDS, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            profiling_in_progress = False
+            root_frame = session.root_frame()
+            breakdown = profile_breakdown(root_frame) if root_frame is not None else None
+            await asyncio.to_thread(_save_profile, profile_id, session, breakdown)
+            if breakdown is not None:
+                print(f"Profile {profile_id} {scope['method']} {scope['path']}: {breakdown}")
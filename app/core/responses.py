@@ -0,0 +1,32 @@
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+class ORJSONResponse(JSONResponse):
+    """Default response class of the app: renders JSON with orjson instead of the json module."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def json_bytes(value: Any, adapter: Optional[TypeAdapter] = None) -> bytes:
+    """
+    Serializes a model we built ourselves straight to JSON with pydantic's compiled serializer.
+
+    Nothing is validated, so models created with model_construct() from trusted data (rows
+    from our database, products already validated by the product service) are written as
+    they are. Values that are not a single model, such as lists, need an adapter for their type.
+    """
+    if adapter is not None:
+        return adapter.dump_json(value, warnings=False)
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value, warnings=False)
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+def model_response(value: Any, status_code: int = 200, adapter: Optional[TypeAdapter] = None) -> Response:
+    """
+    Returns a model as a JSON response without FastAPI validating it again against the
+    route's response_model, which is still used for the documentation.
+    """
+    return Response(content=json_bytes(value, adapter), status_code=status_code, media_type="application/json")
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar
+from cachetools import TLRUCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -15,6 +20,20 @@ http_bearer_scheme = HTTPBearer(
     description="Enter your JWT in the format: Bearer <token>"
 )
 
+class _VerifiedToken(NamedTuple):
+    user: MasterUser
+    expires_at: float
+
+# Tokens that already passed signature and claim checks, keyed by their SHA-256 digest
+# and dropped at their "exp". The signing key they were checked with is remembered so the
+# cache is flushed when SECRET_KEY, ALGORITHM or MASTER_USERNAME change.
+verified_tokens: TLRUCache = TLRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_MAXSIZE,
+    ttu=lambda _key, verified_token, _now: verified_token.expires_at,
+    timer=time.time
+)
+verified_tokens_signing_key: Optional[Tuple[str, str, str]] = None
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain password against a hashed password.
@@ -43,6 +62,80 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+T = TypeVar("T")
+
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel without blocking
+# the event loop. The semaphore admits at most PASSWORD_HASHING_MAX_PENDING hashes
+# (running or queued); beyond that callers are turned away instead of piling up.
+password_hashing_executor: Optional[ThreadPoolExecutor] = None
+password_hashing_slots = asyncio.Semaphore(settings.PASSWORD_HASHING_MAX_PENDING)
+password_hashing_stats: Dict[str, float] = {
+    "calls": 0,
+    "rejected": 0,
+    "seconds": 0.0,
+}
+
+def _get_password_hashing_executor() -> ThreadPoolExecutor:
+    global password_hashing_executor
+    if password_hashing_executor is None:
+        password_hashing_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_POOL_SIZE,
+            thread_name_prefix="password-hashing"
+        )
+    return password_hashing_executor
+
+def close_password_hashing_pool() -> None:
+    """Shuts down the password hashing threads. Called when the application stops."""
+    global password_hashing_executor
+    if password_hashing_executor is not None:
+        password_hashing_executor.shutdown(wait=False, cancel_futures=True)
+        password_hashing_executor = None
+
+def _timed(func: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+async def _run_password_hashing(func: Callable[..., T], *args: Any) -> T:
+    """
+    Runs a password hashing function in the hashing thread pool.
+
+    Raises:
+        HTTPException (status_code 503): If PASSWORD_HASHING_MAX_PENDING hashes are already admitted.
+    """
+    if password_hashing_slots.locked():
+        password_hashing_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+    async with password_hashing_slots:
+        password_hashing_stats["calls"] += 1
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(_get_password_hashing_executor(), _timed, func, *args)
+        password_hashing_stats["seconds"] += elapsed
+        return result
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password like verify_password, without blocking the event loop.
+
+    Raises:
+        HTTPException (status_code 503): If the password hashing pool is saturated.
+    """
+    return await _run_password_hashing(verify_password, plain_password, hashed_password)
+
+def get_password_hashing_stats() -> Dict[str, Any]:
+    """Returns how many hashes ran or were rejected and the total time spent hashing."""
+    return {
+        "calls": password_hashing_stats["calls"],
+        "rejected": password_hashing_stats["rejected"],
+        "seconds": round(password_hashing_stats["seconds"], 6),
+        "pool_size": settings.PASSWORD_HASHING_POOL_SIZE,
+        "max_pending": settings.PASSWORD_HASHING_MAX_PENDING,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Creates a new JWT access token.
@@ -71,6 +164,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def authenticate_admin_token(token: str) -> Optional[MasterUser]:
+    """
+    Checks that a JWT is valid and belongs to the master admin user.
+
+    Tokens that were already verified are served from an LRU cache keyed by a digest of
+    the token until their "exp", so a reused token costs a dictionary lookup instead of a
+    full decode and HMAC check. The cache is flushed when the signing key changes.
+
+    Args:
+        token: The JWT token string.
+
+    Returns:
+        The MasterUser the token belongs to, or None if the token cannot be decoded (invalid
+        format, signature, expired), lacks the "sub" or "role" claims, or they do not match
+        the master admin credentials (settings.MASTER_USERNAME and role "master").
+    """
+    global verified_tokens_signing_key
+    signing_key = (settings.SECRET_KEY, settings.ALGORITHM, settings.MASTER_USERNAME)
+    if verified_tokens_signing_key != signing_key:
+        verified_tokens.clear()
+        verified_tokens_signing_key = signing_key
+    token_digest = hashlib.sha256(token.encode()).digest()
+    verified_token = verified_tokens.get(token_digest)
+    if verified_token is not None:
+        return verified_token.user
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    username: Optional[str] = payload.get("sub")
+    role: Optional[str] = payload.get("role")
+    if role != "master" or username is None or username != settings.MASTER_USERNAME:
+        return None
+
+    user = MasterUser(username=username, role="master")
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        verified_tokens[token_digest] = _VerifiedToken(user=user, expires_at=expires_at)
+    return user
+
 async def get_current_admin_user(
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer_scheme)
 ) -> MasterUser:
@@ -79,7 +213,7 @@ async def get_current_admin_user(
 
     It decodes the provided JWT token, validates its signature and expiration,
     and checks if the user details ("sub" and "role") within the token correspond
-    to the configured master admin user.
+    to the configured master admin user (see authenticate_admin_token).
 
     This function is typically used as a dependency in FastAPI path operations
     to protect routes that require admin authentication.
@@ -99,23 +233,11 @@ async def get_current_admin_user(
             - If the "sub" or "role" claims do not match the master admin credentials
               (settings.MASTER_USERNAME and role "master").
     """
-    token = credentials.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials. Admin access required.",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: Optional[str] = payload.get("sub")
-        role: Optional[str] = payload.get("role")
-
-        if username is None or role is None:
-            raise credentials_exception
-
-        if role == "master" and username == settings.MASTER_USERNAME:
-            return MasterUser(username=username, role="master")
-        else:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
\ No newline at end of file
+    user = authenticate_admin_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials. Admin access required.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,118 @@
+import uuid
+from sqlalchemy import Column, Table, func, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import List, Optional
+
+from app.models.client import Client as ClientModel, client_favorite_products_table
+from app.models.product import Product as ProductRefModel
+
+products_ref_table = ProductRefModel.__table__
+clients_table = ClientModel.__table__
+
+async def get_top_products(db: AsyncSession, limit: int = 10) -> List[Row]:
+    """
+    Retrieves the most favorited products.
+
+    Reads the favorite_count counter of products_ref through its (favorite_count DESC, id)
+    index, so only `limit` index entries are visited whatever the number of favorites.
+
+    Args:
+        db: The asynchronous database session.
+        limit: The number of products to return.
+
+    Returns:
+        Rows with product_id, title and favorite_count, most favorited first (ties by product id).
+        Products that are in no favorites list are left out.
+    """
+    result = await db.execute(
+        select(ProductRefModel.id.label("product_id"), ProductRefModel.title, ProductRefModel.favorite_count)
+        .filter(ProductRefModel.favorite_count > 0)
+        .order_by(ProductRefModel.favorite_count.desc(), ProductRefModel.id)
+        .limit(limit)
+    )
+    return result.all()
+
+async def get_top_clients(db: AsyncSession, limit: int = 10) -> List[Row]:
+    """
+    Retrieves the clients with the most favorites.
+
+    Like get_top_products, reads the favorite_count counter of clients through its
+    (favorite_count DESC, id) index.
+
+    Args:
+        db: The asynchronous database session.
+        limit: The number of clients to return.
+
+    Returns:
+        Rows with client_id, name, email and favorite_count, largest lists first (ties by UUID).
+    """
+    result = await db.execute(
+        select(ClientModel.id.label("client_id"), ClientModel.name, ClientModel.email, ClientModel.favorite_count)
+        .order_by(ClientModel.favorite_count.desc(), ClientModel.id)
+        .limit(limit)
+    )
+    return result.all()
+
+async def get_client_favorite_count(db: AsyncSession, client_id: uuid.UUID) -> Optional[Row]:
+    """Retrieves the favorite count of one client, or None if the client does not exist."""
+    result = await db.execute(
+        select(ClientModel.id.label("client_id"), ClientModel.name, ClientModel.email, ClientModel.favorite_count)
+        .filter(ClientModel.id == client_id)
+    )
+    return result.first()
+
+async def _reconcile_counter(db: AsyncSession, table: Table, favorite_column: Column) -> int:
+    """
+    Sets the favorite_count of the rows of `table` whose counter drifted from the number of
+    their rows in client_favorite_products (referenced by `favorite_column`).
+
+    Drifted rows are found without locking anything. Only those rows are then locked, in
+    id order, and recounted in a new statement, so favorites written concurrently are either
+    already committed and counted, or wait for the lock and apply their own change on top.
+    """
+    favorite_counts = (
+        select(favorite_column.label("id"), func.count().label("favorite_count"))
+        .group_by(favorite_column)
+        .subquery()
+    )
+    result = await db.execute(
+        select(table.c.id)
+        .outerjoin(favorite_counts, favorite_counts.c.id == table.c.id)
+        .filter(table.c.favorite_count != func.coalesce(favorite_counts.c.favorite_count, 0))
+    )
+    drifted_ids = sorted(result.scalars().all())
+    if not drifted_ids:
+        return 0
+
+    await db.execute(select(table.c.id).filter(table.c.id.in_(drifted_ids)).order_by(table.c.id).with_for_update())
+    actual_count = (
+        select(func.count())
+        .select_from(client_favorite_products_table)
+        .filter(favorite_column == table.c.id)
+        .scalar_subquery()
+    )
+    await db.execute(update(table).filter(table.c.id.in_(drifted_ids)).values(favorite_count=actual_count))
+    return len(drifted_ids)
+
+async def reconcile_favorite_counts(db: AsyncSession) -> int:
+    """
+    Corrects the favorite counters of products_ref and clients that drifted from
+    client_favorite_products, e.g. after rows were changed outside of the API.
+
+    Meant to run periodically (FAVORITE_COUNTS_RECONCILE_INTERVAL_SECONDS) through the
+    scheduler. Each run scans the association table once per counter.
+
+    Args:
+        db: The asynchronous database session.
+
+    Returns:
+        The number of counters that were corrected.
+    """
+    corrected = await _reconcile_counter(db, products_ref_table, client_favorite_products_table.c.product_ref_id)
+    corrected += await _reconcile_counter(db, clients_table, client_favorite_products_table.c.client_id)
+    await db.commit()
+    if corrected:
+        print(f"Corrected {corrected} drifted favorite counters.")
+    return corrected
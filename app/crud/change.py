@@ -0,0 +1,150 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import String, delete, func, literal, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.models.change import CLIENT_CHANGES_ID_SEQUENCE, ClientChange as ClientChangeModel
+
+client_changes_table = ClientChangeModel.__table__
+
+CLIENT_CREATED = "client.created"
+CLIENT_UPDATED = "client.updated"
+CLIENT_DELETED = "client.deleted"
+FAVORITES_CHANGED = "favorites.changed"
+
+CHANGE_INSERT_COLUMNS = ("client_id", "type", "version", "data")
+
+def favorites_changed_data(added: Sequence[int] = (), removed: Sequence[int] = ()) -> Dict[str, List[int]]:
+    """The data of a favorites.changed event: the product ids added and removed, sorted."""
+    return {"added": sorted(added), "removed": sorted(removed)}
+
+def client_change_insert(change_type: str, source: Select, data: Optional[Dict[str, Any]] = None):
+    """
+    Builds an INSERT ... SELECT into client_changes, one change per row of `source`.
+
+    Meant to be used as a CTE of the statement that makes the change, so the change is
+    recorded by that same statement.
+
+    Args:
+        change_type: The type of the changes, e.g. FAVORITES_CHANGED.
+        source: A select of (client_id, version) columns.
+        data: The data of every change, if any.
+    """
+    client_id_column, version_column = source.selected_columns
+    return insert(client_changes_table).from_select(
+        list(CHANGE_INSERT_COLUMNS),
+        source.with_only_columns(
+            client_id_column,
+            literal(change_type, String),
+            version_column,
+            literal(data, client_changes_table.c.data.type),
+        )
+    )
+
+async def record_client_changes(db: AsyncSession, changes: List[Dict[str, Any]]) -> None:
+    """
+    Records changes in client_changes, without committing.
+
+    Args:
+        db: The asynchronous database session, in the transaction that made the changes.
+        changes: Dicts with client_id, type, version and data.
+    """
+    if changes:
+        await db.execute(insert(client_changes_table).values([
+            {column: change.get(column) for column in CHANGE_INSERT_COLUMNS} for change in changes
+        ]))
+
+async def get_first_kept_change_id(db: AsyncSession) -> int:
+    """
+    Returns the id of the oldest change still kept or, if every change was pruned, the id
+    the next change will get. Every change issued with a lower id was pruned or rolled back.
+    """
+    oldest_change_id = await db.scalar(select(func.min(ClientChangeModel.id)))
+    if oldest_change_id is not None:
+        return oldest_change_id
+    return await db.scalar(text(
+        f"SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM {CLIENT_CHANGES_ID_SEQUENCE}"
+    ))
+
+async def get_feed_start_id(db: AsyncSession, settle_seconds: float) -> int:
+    """
+    Returns the id a new change feed listener starts after.
+
+    Changes recorded in the last `settle_seconds` may still have uncommitted neighbours with
+    lower ids, so the feed starts before them and they are delivered again, in id order,
+    once every gap among them has closed or timed out. Changes older than that are taken as
+    settled, the same way a gap is given up on after CHANGE_FEED_GAP_TIMEOUT_SECONDS.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    last_settled_id = await db.scalar(
+        select(func.max(ClientChangeModel.id)).filter(ClientChangeModel.created_at < cutoff)
+    )
+    if last_settled_id is not None:
+        return last_settled_id
+    return await get_first_kept_change_id(db) - 1
+
+async def get_changes_after(
+    db: AsyncSession,
+    after_id: int,
+    limit: int,
+    up_to_id: Optional[int] = None,
+    client_ids: Optional[Sequence[uuid.UUID]] = None
+) -> List[Row]:
+    """
+    Retrieves the changes that follow `after_id`, in id order, through the primary key.
+
+    Args:
+        db: The asynchronous database session.
+        after_id: Only changes with a greater id are returned.
+        limit: The maximum number of changes to return.
+        up_to_id: If given, only changes with an id up to this one are returned.
+        client_ids: If given, only changes of these clients are returned.
+
+    Returns:
+        Rows with id, client_id, type, version, data and created_at.
+    """
+    query = (
+        select(
+            ClientChangeModel.id,
+            ClientChangeModel.client_id,
+            ClientChangeModel.type,
+            ClientChangeModel.version,
+            ClientChangeModel.data,
+            ClientChangeModel.created_at,
+        )
+        .filter(ClientChangeModel.id > after_id)
+        .order_by(ClientChangeModel.id)
+        .limit(limit)
+    )
+    if up_to_id is not None:
+        query = query.filter(ClientChangeModel.id <= up_to_id)
+    if client_ids:
+        query = query.filter(ClientChangeModel.client_id.in_(client_ids))
+    result = await db.execute(query)
+    return result.all()
+
+async def prune_client_changes(db: AsyncSession) -> int:
+    """
+    Deletes the changes older than CHANGE_FEED_RETENTION_SECONDS.
+
+    Meant to run periodically (CHANGE_FEED_PRUNE_INTERVAL_SECONDS) through the scheduler.
+    Subscribers that resume from a pruned change are told to resynchronize.
+
+    Args:
+        db: The asynchronous database session.
+
+    Returns:
+        The number of changes deleted.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGE_FEED_RETENTION_SECONDS)
+    result = await db.execute(delete(ClientChangeModel).filter(ClientChangeModel.created_at < cutoff))
+    await db.commit()
+    if result.rowcount:
+        print(f"Pruned {result.rowcount} client changes.")
+    return result.rowcount
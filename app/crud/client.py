@@ -1,39 +1,309 @@
 import uuid
+from datetime import datetime
+from sqlalchemy import Boolean, Float, delete, text, tuple_, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException, status
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Literal, Optional, List, Sequence, Tuple
 
-from app.models.client import Client as ClientModel
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.crud import change as crud_change
+from app.models.client import Client as ClientModel, client_favorite_products_table
+from app.models.product import Product as ProductRefModel
 from app.schemas.client import ClientCreate, ClientUpdate
+from app.services import response_cache
+
+products_ref_table = ProductRefModel.__table__
 
 async def get_client(db: AsyncSession, client_id: uuid.UUID) -> Optional[ClientModel]:
     result = await db.execute(select(ClientModel).filter(ClientModel.id == client_id))
     return result.scalars().first()
 
-async def get_client_by_email(db: AsyncSession, email: str) -> Optional[ClientModel]:
-    result = await db.execute(select(ClientModel).filter(ClientModel.email == email))
-    return result.scalars().first()
+def _select_client_columns():
+    """Column-only projection of a client, used where no ORM object or favorites are needed."""
+    return select(ClientModel.id, ClientModel.name, ClientModel.email)
+
+async def get_client_version(db: AsyncSession, client_id: uuid.UUID) -> Optional[int]:
+    """Returns the current version of a client through the primary key, or None if it does not exist."""
+    return await db.scalar(select(ClientModel.version).filter(ClientModel.id == client_id))
+
+async def get_client_id_by_email(db: AsyncSession, email: str) -> Optional[uuid.UUID]:
+    result = await db.execute(select(ClientModel.id).filter(ClientModel.email == email))
+    return result.scalar()
+
+async def get_clients(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Row]:
+    result = await db.execute(_select_client_columns().offset(skip).limit(limit))
+    return result.all()
+
+ClientSort = Literal["id", "name"]
+
+async def get_clients_page(
+    db: AsyncSession,
+    sort: ClientSort = "id",
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    Returns a page of clients using keyset (cursor) pagination.
+
+    Instead of skipping rows with OFFSET, each page continues right after the last row of
+    the previous one, so every page costs the same no matter how deep it is. Sorting by
+    "id" uses the primary key index and sorting by "name" uses the (name, id) index.
+
+    Args:
+        db: The asynchronous database session.
+        sort: "id" or "name". The cursor must have been created with the same sort.
+        cursor: The next_cursor returned with the previous page, or None for the first page.
+        limit: Maximum number of clients in the page.
+
+    Returns:
+        A tuple with the clients of the page and the cursor for the next page
+        (None when this is the last page).
+
+    Raises:
+        HTTPException (status_code 400): If the cursor is invalid or was created with another sort.
+    """
+    query = _select_client_columns()
+    if sort == "name":
+        query = query.order_by(ClientModel.name, ClientModel.id)
+    else:
+        query = query.order_by(ClientModel.id)
+
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            if position.get("s") != sort:
+                raise ValueError("cursor created with a different sort")
+            last_id = uuid.UUID(position["i"])
+            if sort == "name":
+                query = query.filter(tuple_(ClientModel.name, ClientModel.id) > tuple_(str(position["n"]), last_id))
+            else:
+                query = query.filter(ClientModel.id > last_id)
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    result = await db.execute(query.limit(limit + 1))
+    clients = list(result.all())
+
+    next_cursor = None
+    if len(clients) > limit:
+        clients = clients[:limit]
+        last_client = clients[-1]
+        position = {"s": sort, "i": str(last_client.id)}
+        if sort == "name":
+            position["n"] = last_client.name
+        next_cursor = encode_cursor(position)
+    return clients, next_cursor
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string, in code point order, that is greater than every string starting with prefix."""
+    for position in range(len(prefix) - 1, -1, -1):
+        code_point = ord(prefix[position]) + 1
+        if 0xD800 <= code_point <= 0xDFFF:
+            code_point = 0xE000
+        if code_point <= 0x10FFFF:
+            return prefix[:position] + chr(code_point)
+    return None
+
+async def search_clients(
+    db: AsyncSession,
+    email_prefix: Optional[str] = None,
+    name: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    Searches clients by email prefix or by approximate name, using cursor pagination.
+
+    An email search matches, ignoring case, the emails that start with email_prefix. It is
+    read as a range of the (lower(email) COLLATE "C", id) index and ordered by email, so
+    every page costs the same. A name search matches names similar to `name` (pg_trgm
+    trigram similarity, ignoring case), closest first, using the nearest-neighbour scan of
+    the trigram GiST index. Similarity is not a key that an index range can start from, so
+    a name search stops after CLIENT_SEARCH_MAX_RESULTS results to keep deep pages bounded.
+
+    Args:
+        db: The asynchronous database session.
+        email_prefix: The beginning of the email. Exactly one of email_prefix and name must be given.
+        name: The name, or part of it, to search for.
+        cursor: The next_cursor returned with the previous page, or None for the first page.
+        limit: Maximum number of clients in the page.
+
+    Returns:
+        A tuple with the clients of the page and the cursor for the next page
+        (None when there are no more results).
+
+    Raises:
+        HTTPException (status_code 400): If neither or both of email_prefix and name are given,
+            or if the cursor is invalid or was created for another search.
+    """
+    if (email_prefix is None) == (name is None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search by either email or name.")
+
+    field = "email" if email_prefix is not None else "name"
+    term = (email_prefix if email_prefix is not None else name).lower()
+    query = _select_client_columns()
+    if field == "email":
+        sort_key = func.lower(ClientModel.email).collate("C")
+        query = query.filter(sort_key >= term)
+        upper_bound = _prefix_upper_bound(term)
+        if upper_bound is not None:
+            query = query.filter(sort_key < upper_bound)
+    else:
+        lower_name = func.lower(ClientModel.name)
+        sort_key = lower_name.op("<->", return_type=Float)(term)
+        query = query.filter(lower_name.op("%", return_type=Boolean)(term))
+
+    returned_count = 0
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            if position.get("f") != field or position.get("q") != term:
+                raise ValueError("cursor created for a different search")
+            last_key = position["k"]
+            if not isinstance(last_key, str if field == "email" else (int, float)):
+                raise ValueError("invalid sort key")
+            query = query.filter(tuple_(sort_key, ClientModel.id) > tuple_(last_key, uuid.UUID(position["i"])))
+            returned_count = int(position.get("n", 0))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    if field == "name":
+        limit = min(limit, max(settings.CLIENT_SEARCH_MAX_RESULTS - returned_count, 0))
+        if limit == 0:
+            return [], None
+
+    result = await db.execute(
+        query.add_columns(sort_key.label("sort_key")).order_by(sort_key, ClientModel.id).limit(limit + 1)
+    )
+    clients = list(result.all())
+
+    next_cursor = None
+    if len(clients) > limit:
+        clients = clients[:limit]
+        returned_count += limit
+        if field == "email" or returned_count < settings.CLIENT_SEARCH_MAX_RESULTS:
+            position = {"f": field, "q": term, "k": clients[-1].sort_key, "i": str(clients[-1].id)}
+            if field == "name":
+                position["n"] = returned_count
+            next_cursor = encode_cursor(position)
+    return clients, next_cursor
+
+async def get_approximate_client_count(db: AsyncSession) -> Optional[int]:
+    """
+    Returns the planner's estimate of the number of clients, instead of a COUNT(*) scan.
+
+    The estimate comes from pg_class.reltuples, kept up to date by VACUUM/ANALYZE.
+
+    Returns:
+        The estimated number of rows, or None if the table has never been analyzed.
+    """
+    estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'clients'::regclass"))
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
 
-async def get_clients(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[ClientModel]:
-    result = await db.execute(select(ClientModel).offset(skip).limit(limit))
-    return result.scalars().all()
+async def stream_clients_for_export(
+    db: AsyncSession,
+    include_favorites: bool = False,
+    after_id: Optional[uuid.UUID] = None,
+    updated_since: Optional[datetime] = None
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Streams every client ordered by id, in chunks, through a server-side cursor.
+
+    Rows are fetched CLIENT_EXPORT_BATCH_SIZE at a time, so memory use does not depend on
+    the size of the table. Favorite product ids are aggregated per client with a
+    correlated subquery that uses the client_favorite_products primary key.
+
+    Args:
+        db: The asynchronous database session. It must stay open while the stream is consumed.
+        include_favorites: Adds a favorite_product_ids column (None when the client has no favorites).
+        after_id: Resumes the export after this client id (the last id already received).
+        updated_since: Only exports clients created or changed (including their favorites) at or after this time.
+
+    Yields:
+        Lists of rows with id, name, email, updated_at and, optionally, favorite_product_ids.
+    """
+    query = select(ClientModel.id, ClientModel.name, ClientModel.email, ClientModel.updated_at)
+    if include_favorites:
+        favorite_ids = (
+            select(func.array_agg(client_favorite_products_table.c.product_ref_id))
+            .where(client_favorite_products_table.c.client_id == ClientModel.id)
+            .scalar_subquery()
+        )
+        query = query.add_columns(favorite_ids.label("favorite_product_ids"))
+    if after_id is not None:
+        query = query.filter(ClientModel.id > after_id)
+    if updated_since is not None:
+        query = query.filter(ClientModel.updated_at >= updated_since)
+
+    result = await db.stream(
+        query.order_by(ClientModel.id).execution_options(yield_per=settings.CLIENT_EXPORT_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield rows
 
 async def create_client(db: AsyncSession, client_in: ClientCreate) -> ClientModel:
-    existing_client = await get_client_by_email(db, email=client_in.email)
-    if existing_client:
+    existing_client_id = await get_client_id_by_email(db, email=client_in.email)
+    if existing_client_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered.")
 
 
     db_client = ClientModel(
+        id=uuid.uuid4(),
         name=client_in.name,
-        email=client_in.email
+        email=client_in.email,
+        version=1
     )
     db.add(db_client)
+    await crud_change.record_client_changes(db, [
+        {"client_id": db_client.id, "type": crud_change.CLIENT_CREATED, "version": db_client.version}
+    ])
     await db.commit()
     await db.refresh(db_client)
+    response_cache.set_client_version(db_client.id, db_client.version)
     return db_client
 
+async def insert_clients_batch(db: AsyncSession, clients_in: List[ClientCreate]) -> Dict[str, uuid.UUID]:
+    """
+    Inserts many clients with INSERT ... ON CONFLICT (email) DO NOTHING and commits.
+
+    The rows are sent as one executemany, which SQLAlchemy batches into multi-row
+    INSERT statements compiled only once. A client.created change is recorded for every
+    client created, with one more multi-row INSERT.
+
+    Args:
+        db: The asynchronous database session.
+        clients_in: The clients to insert. Emails must be unique within the list.
+
+    Returns:
+        A dict mapping the email of every client actually created to its new UUID.
+        Emails missing from it were already registered.
+    """
+    if not clients_in:
+        return {}
+    stmt = (
+        insert(ClientModel)
+        .on_conflict_do_nothing(index_elements=[ClientModel.email])
+        .returning(ClientModel.id, ClientModel.email)
+    )
+    result = await db.execute(stmt, [
+        {"id": uuid.uuid4(), "name": client_in.name, "email": client_in.email}
+        for client_in in clients_in
+    ])
+    created = {row.email: row.id for row in result}
+    await crud_change.record_client_changes(db, [
+        {"client_id": client_id, "type": crud_change.CLIENT_CREATED, "version": 1} for client_id in created.values()
+    ])
+    await db.commit()
+    for client_id in created.values():
+        response_cache.set_client_version(client_id, 1)
+    return created
+
 async def update_client(db: AsyncSession, client_id: uuid.UUID, client_in: ClientUpdate) -> Optional[ClientModel]:
     db_client = await get_client(db, client_id)
     if not db_client:
@@ -41,21 +311,58 @@ async def update_client(db: AsyncSession, client_id: uuid.UUID, client_in: Clien
 
     update_data = client_in.model_dump(exclude_unset=True)
     if "email" in update_data and update_data["email"] != db_client.email:
-        existing_client_by_new_email = await get_client_by_email(db, email=update_data["email"])
-        if existing_client_by_new_email and existing_client_by_new_email.id != client_id:
+        existing_client_id = await get_client_id_by_email(db, email=update_data["email"])
+        if existing_client_id and existing_client_id != client_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="New email already registered by another user.")
 
     for key, value in update_data.items():
         setattr(db_client, key, value)
+    db_client.version = ClientModel.version + 1
+    await db.flush()
+    await db.execute(crud_change.client_change_insert(
+        crud_change.CLIENT_UPDATED,
+        select(ClientModel.id, ClientModel.version).filter(ClientModel.id == client_id),
+        {"fields": sorted(update_data)}
+    ))
 
     await db.commit()
     await db.refresh(db_client)
+    response_cache.set_client_version(db_client.id, db_client.version)
     return db_client
 
-async def delete_client(db: AsyncSession, client_id: uuid.UUID) -> Optional[ClientModel]:
-    db_client = await get_client(db, client_id)
-    if not db_client:
-        return None
-    await db.delete(db_client)
+async def delete_client(db: AsyncSession, client_id: uuid.UUID) -> Optional[uuid.UUID]:
+    # The client's favorites are removed by ON DELETE CASCADE; the favorite counters of
+    # their products go down in the same statement, after locking them in id order so
+    # concurrent deletes cannot deadlock. The client.deleted change is recorded by that
+    # statement too.
+    locked_products = (
+        select(products_ref_table.c.id)
+        .filter(products_ref_table.c.id.in_(
+            select(client_favorite_products_table.c.product_ref_id)
+            .filter(client_favorite_products_table.c.client_id == client_id)
+        ))
+        .order_by(products_ref_table.c.id)
+        .with_for_update()
+        .cte("locked_products")
+    )
+    product_uncount = (
+        update(products_ref_table)
+        .filter(products_ref_table.c.id.in_(select(locked_products.c.id)))
+        .values(favorite_count=products_ref_table.c.favorite_count - 1)
+        .cte("product_uncount")
+    )
+    client_delete = (
+        delete(ClientModel)
+        .filter(ClientModel.id == client_id)
+        .returning(ClientModel.id, ClientModel.version)
+        .cte("client_delete")
+    )
+    result = await db.execute(
+        crud_change.client_change_insert(crud_change.CLIENT_DELETED, select(client_delete.c.id, client_delete.c.version + 1))
+        .returning(crud_change.client_changes_table.c.client_id)
+        .add_cte(product_uncount)
+    )
+    deleted_client_id = result.scalar()
     await db.commit()
-    return db_client
\ No newline at end of file
+    response_cache.forget_client(client_id)
+    return deleted_client_id
\ No newline at end of file
@@ -1,139 +1,673 @@
 import uuid
+import orjson
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Integer, case, delete, func, literal, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
-from typing import List, Optional
-import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from app.models.client import Client as ClientModel
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.responses import json_bytes
+from app.crud import change as crud_change
+from app.crud.product import PRODUCT_REF_DISPLAY_COLUMNS, product_ref_display_fields
+from app.models.client import Client as ClientModel, client_favorite_products_table
 from app.models.product import Product as ProductRefModel
+from app.schemas.client import ClientWithFavorites
+from app.schemas.favorite import FavoriteOperation, FavoriteOperationResult, FavoriteBatchResult
 from app.schemas.product import FavoriteProductDisplay, ProductExternal
-from app.services import product_service
+from app.services import product_service, response_cache
 
-async def add_favorite_product(db: AsyncSession, client_id: uuid.UUID, product_id: int) -> ClientModel:
+products_ref_table = ProductRefModel.__table__
+
+# Name Postgres gives the foreign key of client_favorite_products.client_id.
+CLIENT_FAVORITE_CLIENT_FK = "client_favorite_products_client_id_fkey"
+
+def _is_missing_client_error(error: IntegrityError) -> bool:
+    """True if a statement failed on the client_id foreign key, i.e. the client was deleted meanwhile."""
+    cause = getattr(error.orig, "__cause__", None)
+    return getattr(cause, "constraint_name", None) == CLIENT_FAVORITE_CLIENT_FK
+
+FAVORITE_ROW_COLUMNS = (
+    ProductRefModel.id.label("product_id"),
+    ProductRefModel.title,
+    ProductRefModel.price,
+    ProductRefModel.image,
+    ProductRefModel.rating_rate,
+    ProductRefModel.rating_count,
+    ProductRefModel.fetched_at,
+)
+
+def _select_client_with_favorite_rows(client_id: uuid.UUID, *extra_columns):
+    """
+    Selects the client joined with the stored display fields of each of its favorites.
+
+    Returns one row per favorite (or a single row with a NULL product_id when there are
+    none), and no rows at all when the client does not exist.
+    """
+    return (
+        select(ClientModel.id, ClientModel.name, ClientModel.email, ClientModel.version, *extra_columns, *FAVORITE_ROW_COLUMNS)
+        .select_from(ClientModel)
+        .outerjoin(client_favorite_products_table, client_favorite_products_table.c.client_id == ClientModel.id)
+        .outerjoin(ProductRefModel, ProductRefModel.id == client_favorite_products_table.c.product_ref_id)
+        .filter(ClientModel.id == client_id)
+        .order_by(client_favorite_products_table.c.product_ref_id)
+    )
+
+async def add_favorite_product(db: AsyncSession, client_id: uuid.UUID, product_id: int) -> ClientWithFavorites:
     """
     Adds a product to a client's list of favorite products.
 
+    After the product is validated against the (cached) external API, the products_ref
+    upsert, the INSERT ... ON CONFLICT DO NOTHING RETURNING into client_favorite_products,
+    the client's updated_at bump, the favorite counters of the product and the client, the
+    favorites.changed change and the read of the current favorites all run as a single
+    statement, so the cost does not depend on the size of the favorites list.
+
     Args:
         db: The asynchronous database session.
         client_id: The UUID of the client.
         product_id: The ID of the product to add to favorites (from external API).
 
     Returns:
-        The updated ClientModel object with the new favorite product association.
+        The client with its updated list of favorites, built from the result of the statement.
 
     Raises:
-        HTTPException (various, see original docstring)
+        HTTPException (status_code 404): If the client or the product does not exist.
+        HTTPException (status_code 400): If the product is already in the client's favorites.
     """
-    client = await db.get(ClientModel, client_id, options=[selectinload(ClientModel.favorite_products)])
-    if not client:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
-
     external_product_data = await product_service.get_cached_product_by_id(product_id)
     if not external_product_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product with id {product_id} not found in external API.")
 
-    if any(fav_prod_ref.id == product_id for fav_prod_ref in client.favorite_products):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product already in favorites.")
+    favorite_insert = (
+        insert(client_favorite_products_table)
+        .from_select(
+            ["client_id", "product_ref_id"],
+            select(ClientModel.id, literal(product_id, Integer)).filter(ClientModel.id == client_id)
+        )
+        .on_conflict_do_nothing()
+        .returning(client_favorite_products_table.c.client_id)
+        .cte("favorite_insert")
+    )
+    inserted_count = select(func.count()).select_from(favorite_insert).scalar_subquery()
+    # The product's counter goes up in the same upsert that stores its display fields,
+    # since a row cannot be modified by two parts of one statement. Stored fields are
+    # only overwritten when they were never fetched.
+    display_fields = product_ref_display_fields(external_product_data)
+    ref_upsert = insert(products_ref_table).values(id=product_id, favorite_count=inserted_count, **display_fields)
+    ref_upsert = ref_upsert.on_conflict_do_update(
+        index_elements=[products_ref_table.c.id],
+        set_={
+            **{
+                column: case((products_ref_table.c.fetched_at.is_(None), ref_upsert.excluded[column]), else_=products_ref_table.c[column])
+                for column in display_fields
+            },
+            "favorite_count": products_ref_table.c.favorite_count + ref_upsert.excluded.favorite_count,
+        },
+        where=or_(products_ref_table.c.fetched_at.is_(None), ref_upsert.excluded.favorite_count != 0)
+    ).cte("ref_upsert")
+    client_touch = (
+        update(ClientModel)
+        .filter(ClientModel.id.in_(select(favorite_insert.c.client_id)))
+        .values(updated_at=func.now(), version=ClientModel.version + 1, favorite_count=ClientModel.favorite_count + 1)
+        .returning(ClientModel.id, ClientModel.version)
+        .cte("client_touch")
+    )
+    change_insert = crud_change.client_change_insert(
+        crud_change.FAVORITES_CHANGED,
+        select(client_touch.c.id, client_touch.c.version),
+        crud_change.favorites_changed_data(added=[product_id])
+    ).cte("change_insert")
+    new_version = select(client_touch.c.version).scalar_subquery()
 
-    product_ref = await db.get(ProductRefModel, product_id)
-    if not product_ref:
-        product_ref = ProductRefModel(id=product_id)
-        db.add(product_ref)
+    try:
+        result = await db.execute(
+            _select_client_with_favorite_rows(client_id, inserted_count.label("changed"), new_version.label("new_version"))
+            .add_cte(ref_upsert, change_insert)
+        )
+        rows = result.all()
+    except IntegrityError as e:
+        await db.rollback()
+        if not _is_missing_client_error(e):
+            raise
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
 
-    client.favorite_products.add(product_ref)
+    if not rows:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    if rows[0].changed == 0:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product already in favorites.")
     await db.commit()
-    await db.refresh(client)
-    return client
+    response_cache.set_client_version(client_id, rows[0].new_version)
+
+    favorites = await _build_favorites(rows)
+    favorites.append(favorite_display_from_external(external_product_data))
+    favorites.sort(key=lambda favorite: favorite.id)
+    return ClientWithFavorites.model_construct(id=rows[0].id, name=rows[0].name, email=rows[0].email, favorites=favorites)
 
-async def remove_favorite_product(db: AsyncSession, client_id: uuid.UUID, product_id: int) -> ClientModel:
+async def remove_favorite_product(db: AsyncSession, client_id: uuid.UUID, product_id: int) -> ClientWithFavorites:
     """
     Removes a product from a client's list of favorite products.
 
+    The DELETE ... RETURNING on client_favorite_products, the client's updated_at bump, the
+    favorite counters of the product and the client, the favorites.changed change and the
+    read of the favorites run as a single statement.
+
     Args:
         db: The asynchronous database session.
         client_id: The UUID of the client.
         product_id: The ID of the product to remove from favorites.
 
     Returns:
-        The updated ClientModel object after removing the product association.
+        The client with its updated list of favorites, built from the result of the statement.
 
     Raises:
-        HTTPException (various, see original docstring)
+        HTTPException (status_code 404): If the client does not exist or the product is not in its favorites.
     """
-    client = await db.get(ClientModel, client_id, options=[selectinload(ClientModel.favorite_products)])
-    if not client:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    favorite_delete = (
+        delete(client_favorite_products_table)
+        .where(
+            client_favorite_products_table.c.client_id == client_id,
+            client_favorite_products_table.c.product_ref_id == product_id
+        )
+        .returning(client_favorite_products_table.c.client_id, client_favorite_products_table.c.product_ref_id)
+        .cte("favorite_delete")
+    )
+    client_touch = (
+        update(ClientModel)
+        .filter(ClientModel.id.in_(select(favorite_delete.c.client_id)))
+        .values(updated_at=func.now(), version=ClientModel.version + 1, favorite_count=ClientModel.favorite_count - 1)
+        .returning(ClientModel.id, ClientModel.version)
+        .cte("client_touch")
+    )
+    change_insert = crud_change.client_change_insert(
+        crud_change.FAVORITES_CHANGED,
+        select(client_touch.c.id, client_touch.c.version),
+        crud_change.favorites_changed_data(removed=[product_id])
+    ).cte("change_insert")
+    product_uncount = (
+        update(products_ref_table)
+        .filter(products_ref_table.c.id.in_(select(favorite_delete.c.product_ref_id)))
+        .values(favorite_count=products_ref_table.c.favorite_count - 1)
+        .cte("product_uncount")
+    )
+    deleted_count = select(func.count()).select_from(favorite_delete).scalar_subquery()
+    new_version = select(client_touch.c.version).scalar_subquery()
 
-    product_ref_to_remove = None
-    for fav_prod_ref in client.favorite_products:
-        if fav_prod_ref.id == product_id:
-            product_ref_to_remove = fav_prod_ref
-            break
+    result = await db.execute(
+        _select_client_with_favorite_rows(client_id, deleted_count.label("changed"), new_version.label("new_version"))
+        .add_cte(product_uncount, change_insert)
+    )
+    rows = result.all()
 
-    if not product_ref_to_remove:
+    if not rows:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    if rows[0].changed == 0:
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not in client's favorites.")
+    await db.commit()
+    response_cache.set_client_version(client_id, rows[0].new_version)
+
+    favorites = await _build_favorites([row for row in rows if row.product_id != product_id])
+    return ClientWithFavorites.model_construct(id=rows[0].id, name=rows[0].name, email=rows[0].email, favorites=favorites)
+
+def _unnest_favorite_pairs(pairs: List[Tuple[uuid.UUID, int]]):
+    """Turns (client_id, product_id) pairs into a table expression built from two array parameters."""
+    return func.unnest(
+        literal([client_id for client_id, _ in pairs], ARRAY(UUID(as_uuid=True))),
+        literal([product_id for _, product_id in pairs], ARRAY(Integer)),
+    ).table_valued("client_id", "product_ref_id").render_derived()
+
+def _unnest_deltas(deltas: Dict, key_type, key_name: str):
+    """Turns a {key: delta} mapping into a table expression with (key_name, delta) columns."""
+    return func.unnest(
+        literal(list(deltas), ARRAY(key_type)),
+        literal(list(deltas.values()), ARRAY(Integer)),
+    ).table_valued(key_name, "delta").render_derived()
+
+def _net_favorite_changes(operations: Iterable[Tuple[FavoriteOperation, Set[int]]]) -> Dict[uuid.UUID, dict]:
+    """
+    Folds the operations of each client, in order, into a single net change.
 
-    client.favorite_products.remove(product_ref_to_remove)
+    A "replace" makes the client's final set of favorites known, so later adds and removes
+    are applied to that set; otherwise the adds and removes are accumulated, the last
+    operation on a product winning.
+    """
+    changes: Dict[uuid.UUID, dict] = {}
+    for operation, product_ids in operations:
+        change = changes.setdefault(operation.client_id, {"replace": None, "add": set(), "remove": set()})
+        if operation.op == "replace":
+            change["replace"] = set(product_ids)
+            change["add"].clear()
+            change["remove"].clear()
+        elif change["replace"] is not None:
+            if operation.op == "add":
+                change["replace"] |= product_ids
+            else:
+                change["replace"] -= product_ids
+        elif operation.op == "add":
+            change["add"] |= product_ids
+            change["remove"] -= product_ids
+        else:
+            change["remove"] |= product_ids
+            change["add"] -= product_ids
+    return changes
+
+async def apply_favorite_operations(db: AsyncSession, operations: List[FavoriteOperation]) -> FavoriteBatchResult:
+    """
+    Applies a batch of add/remove/replace operations on the favorites of many clients.
+
+    Every product id to be added is validated with one product service lookup, and the
+    clients are checked (and locked, in id order, for the update) with one query. Operations for
+    unknown clients or with unknown products are skipped and reported; the others are
+    folded into a net change per client and applied, inside one transaction, with a few
+    set-based statements over unnest()ed arrays of (client_id, product_id) pairs. The
+    favorite counters of the clients and products are updated, and one favorites.changed
+    change per client is recorded, in the same transaction.
+
+    Args:
+        db: The asynchronous database session.
+        operations: The operations, applied in order.
+
+    Returns:
+        The number of favorites actually added and removed, and the status of each operation.
+
+    Raises:
+        HTTPException (status_code 503): If the external API fails while validating the products.
+    """
+    product_ids_to_validate = {
+        product_id for operation in operations if operation.op != "remove" for product_id in operation.product_ids
+    }
+    products_by_id = await product_service.get_cached_products_by_ids(product_ids_to_validate)
+    if any(product_id not in products_by_id for product_id in product_ids_to_validate):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External product API is unavailable.")
+
+    # The client rows are locked up front, in id order, for the version and counter updates
+    # at the end, so concurrent batches touching overlapping clients cannot deadlock on them.
+    result = await db.execute(
+        select(ClientModel.id)
+        .filter(ClientModel.id.in_({operation.client_id for operation in operations}))
+        .order_by(ClientModel.id)
+        .with_for_update(no_key=True)
+    )
+    existing_client_ids = set(result.scalars().all())
+
+    report = FavoriteBatchResult()
+    valid_operations: List[Tuple[FavoriteOperation, Set[int]]] = []
+    for operation in operations:
+        if operation.client_id not in existing_client_ids:
+            report.results.append(FavoriteOperationResult(status="client_not_found"))
+            continue
+        product_ids = set(operation.product_ids)
+        invalid_product_ids = [] if operation.op == "remove" else sorted(
+            product_id for product_id in product_ids if products_by_id[product_id] is None
+        )
+        if invalid_product_ids:
+            report.results.append(FavoriteOperationResult(status="invalid_products", invalid_product_ids=invalid_product_ids))
+            continue
+        valid_operations.append((operation, product_ids))
+        report.results.append(FavoriteOperationResult(status="applied"))
+
+    changes = _net_favorite_changes(valid_operations)
+    insert_pairs: List[Tuple[uuid.UUID, int]] = []
+    delete_pairs: List[Tuple[uuid.UUID, int]] = []
+    replaced_client_ids: List[uuid.UUID] = []
+    kept_pairs: List[Tuple[uuid.UUID, int]] = []
+    for client_id, change in changes.items():
+        if change["replace"] is not None:
+            replaced_client_ids.append(client_id)
+            kept_pairs.extend((client_id, product_id) for product_id in change["replace"])
+        else:
+            insert_pairs.extend((client_id, product_id) for product_id in change["add"])
+            delete_pairs.extend((client_id, product_id) for product_id in change["remove"])
+
+    insert_pairs.extend(kept_pairs)
+
+    client_deltas: Dict[uuid.UUID, int] = {}
+    product_deltas: Dict[int, int] = {}
+    # {client_id: (product ids added, product ids removed)}
+    client_product_changes: Dict[uuid.UUID, Tuple[List[int], List[int]]] = {}
+
+    def count_changes(changed_pairs: Sequence[Row], delta: int) -> None:
+        for client_id, product_id in changed_pairs:
+            client_deltas[client_id] = client_deltas.get(client_id, 0) + delta
+            product_deltas[product_id] = product_deltas.get(product_id, 0) + delta
+            client_product_changes.setdefault(client_id, ([], []))[0 if delta > 0 else 1].append(product_id)
+
+    favorite_key = tuple_(client_favorite_products_table.c.client_id, client_favorite_products_table.c.product_ref_id)
+
+    if replaced_client_ids:
+        kept = _unnest_favorite_pairs(kept_pairs)
+        result = await db.execute(
+            delete(client_favorite_products_table)
+            .where(
+                client_favorite_products_table.c.client_id.in_(replaced_client_ids),
+                favorite_key.not_in(select(kept.c.client_id, kept.c.product_ref_id))
+            )
+            .returning(client_favorite_products_table.c.client_id, client_favorite_products_table.c.product_ref_id)
+        )
+        removed_pairs = result.all()
+        report.removed += len(removed_pairs)
+        count_changes(removed_pairs, -1)
+
+    if delete_pairs:
+        pairs_to_delete = _unnest_favorite_pairs(delete_pairs)
+        result = await db.execute(
+            delete(client_favorite_products_table)
+            .where(favorite_key.in_(select(pairs_to_delete.c.client_id, pairs_to_delete.c.product_ref_id)))
+            .returning(client_favorite_products_table.c.client_id, client_favorite_products_table.c.product_ref_id)
+        )
+        removed_pairs = result.all()
+        report.removed += len(removed_pairs)
+        count_changes(removed_pairs, -1)
+
+    if insert_pairs:
+        ref_upsert = insert(products_ref_table).values([
+            {"id": product_id, **product_ref_display_fields(products_by_id[product_id])}
+            for product_id in sorted({product_id for _, product_id in insert_pairs})
+        ])
+        await db.execute(ref_upsert.on_conflict_do_update(
+            index_elements=[products_ref_table.c.id],
+            set_={column: ref_upsert.excluded[column] for column in PRODUCT_REF_DISPLAY_COLUMNS},
+            where=products_ref_table.c.fetched_at.is_(None)
+        ))
+        pairs_to_insert = _unnest_favorite_pairs(insert_pairs)
+        result = await db.execute(
+            insert(client_favorite_products_table)
+            .from_select(["client_id", "product_ref_id"], select(pairs_to_insert.c.client_id, pairs_to_insert.c.product_ref_id))
+            .on_conflict_do_nothing()
+            .returning(client_favorite_products_table.c.client_id, client_favorite_products_table.c.product_ref_id)
+        )
+        added_pairs = result.all()
+        report.added += len(added_pairs)
+        count_changes(added_pairs, 1)
+
+    product_deltas = {product_id: delta for product_id, delta in sorted(product_deltas.items()) if delta}
+    if product_deltas:
+        # Counter rows are locked in id order, so concurrent batches cannot deadlock on them.
+        await db.execute(
+            select(products_ref_table.c.id)
+            .filter(products_ref_table.c.id.in_(product_deltas))
+            .order_by(products_ref_table.c.id)
+            .with_for_update()
+        )
+        product_delta_rows = _unnest_deltas(product_deltas, Integer, "product_ref_id")
+        await db.execute(
+            update(products_ref_table)
+            .where(products_ref_table.c.id == product_delta_rows.c.product_ref_id)
+            .values(favorite_count=products_ref_table.c.favorite_count + product_delta_rows.c.delta)
+        )
+
+    client_versions: List[Row] = []
+    if client_deltas:
+        client_delta_rows = _unnest_deltas(client_deltas, UUID(as_uuid=True), "client_id")
+        result = await db.execute(
+            update(ClientModel)
+            .where(ClientModel.id == client_delta_rows.c.client_id)
+            .values(
+                updated_at=func.now(),
+                version=ClientModel.version + 1,
+                favorite_count=ClientModel.favorite_count + client_delta_rows.c.delta
+            )
+            .returning(ClientModel.id, ClientModel.version)
+        )
+        client_versions = result.all()
+        await crud_change.record_client_changes(db, [
+            {
+                "client_id": client_id,
+                "type": crud_change.FAVORITES_CHANGED,
+                "version": version,
+                "data": crud_change.favorites_changed_data(*client_product_changes[client_id]),
+            }
+            for client_id, version in client_versions
+        ])
     await db.commit()
-    await db.refresh(client)
-    return client
+    for client_id, version in client_versions:
+        response_cache.set_client_version(client_id, version)
+    return report
 
-async def get_formatted_favorites_for_client(db: AsyncSession, client_id: uuid.UUID) -> List[FavoriteProductDisplay]:
+def favorite_display_from_external(product: ProductExternal) -> FavoriteProductDisplay:
     """
-    Retrieves a list of favorite products for a given client, formatted for display.
+    Returns the display schema of a favorite from the product returned by the external API.
+
+    The display comes from the product service's display cache, so it is only built
+    (without validating the product again) once per cached product.
+    """
+    return product_service.get_product_display(product).display
+
+def _favorite_display_from_ref_row(row: Row) -> FavoriteProductDisplay:
+    """Builds the display schema of a favorite from the fields stored in products_ref."""
+    return FavoriteProductDisplay.model_construct(
+        id=row.product_id,
+        title=row.title,
+        image=row.image,
+        price=row.price,
+        review=row.rating_rate,
+        review_count=row.rating_count
+    )
+
+def _ref_row_product_display(row: Row) -> product_service.ProductDisplay:
+    return product_service.get_stored_product_display(
+        row.product_id, row.fetched_at, lambda: _favorite_display_from_ref_row(row)
+    )
+
+def _is_ref_row_displayable(row: Row, oldest_fetched_at: datetime) -> bool:
+    return row.fetched_at is not None and row.fetched_at >= oldest_fetched_at and row.title is not None and row.price is not None
+
+async def _resolve_favorite_displays(rows: Sequence[Row]) -> Dict[int, product_service.ProductDisplay]:
+    """
+    Resolves the display, and its JSON, of every distinct product in rows selected with
+    FAVORITE_ROW_COLUMNS. Both come from the product service's display cache.
+
+    Only products whose stored fields are missing or older than PRODUCT_REF_MAX_AGE_SECONDS
+    are resolved through the product service, with a single lookup. Rows without a
+    product_id are ignored, and products the service could not resolve are left out.
+    """
+    oldest_fetched_at = datetime.now(timezone.utc) - timedelta(seconds=settings.PRODUCT_REF_MAX_AGE_SECONDS)
+    displays_by_id: Dict[int, product_service.ProductDisplay] = {}
+    product_ids_to_fetch: Set[int] = set()
+    for row in rows:
+        if row.product_id is None or row.product_id in displays_by_id:
+            continue
+        if _is_ref_row_displayable(row, oldest_fetched_at):
+            displays_by_id[row.product_id] = _ref_row_product_display(row)
+        else:
+            product_ids_to_fetch.add(row.product_id)
+
+    if product_ids_to_fetch:
+        products_by_id = await product_service.get_cached_products_by_ids(product_ids_to_fetch)
+        for product_id in product_ids_to_fetch:
+            product_data: Optional[ProductExternal] = products_by_id.get(product_id)
+            if product_data:
+                displays_by_id[product_id] = product_service.get_product_display(product_data)
+
+    return displays_by_id
+
+async def _build_favorites(rows: Sequence[Row]) -> List[FavoriteProductDisplay]:
+    """Builds the favorites list of one client, in row order, from rows selected with FAVORITE_ROW_COLUMNS."""
+    displays_by_id = await _resolve_favorite_displays(rows)
+    return [displays_by_id[row.product_id].display for row in rows if row.product_id in displays_by_id]
+
+async def _favorite_fragments(rows: Sequence[Row]) -> List[orjson.Fragment]:
+    """Like _build_favorites, but returns the already serialized JSON of each favorite."""
+    displays_by_id = await _resolve_favorite_displays(rows)
+    return [orjson.Fragment(displays_by_id[row.product_id].json) for row in rows if row.product_id in displays_by_id]
+
+async def _select_client_favorite_fragments(db: AsyncSession, client_id: uuid.UUID) -> Tuple[Row, List[orjson.Fragment]]:
+    result = await db.execute(_select_client_with_favorite_rows(client_id))
+    rows = result.all()
+
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+
+    return rows[0], await _favorite_fragments(rows)
+
+async def get_client_with_favorites_json(db: AsyncSession, client_id: uuid.UUID) -> Tuple[int, bytes]:
+    """
+    Retrieves a client and its formatted favorites with a single join on products_ref,
+    serialized as a ClientWithFavorites.
+
+    The JSON of each favorite is taken from the product service's display cache and joined
+    as it is, so no model is built or serialized per favorite.
 
     Args:
         db: The asynchronous database session.
-        client_id: The UUID of the client whose favorites are to be retrieved.
+        client_id: The UUID of the client.
 
     Returns:
-        A list of FavoriteProductDisplay Pydantic schema objects.
+        The client's current version, and the JSON of the client with its favorites
+        ordered by product id.
 
     Raises:
         HTTPException: If the client with the given client_id is not found (status_code 404).
     """
+    row, favorites = await _select_client_favorite_fragments(db, client_id)
+    return row.version, json_bytes({"name": row.name, "email": row.email, "id": str(row.id), "favorites": favorites})
+
+async def get_favorites_json(db: AsyncSession, client_id: uuid.UUID) -> Tuple[int, bytes]:
+    """
+    Retrieves the formatted favorites of a client, serialized as a list of FavoriteProductDisplay.
+
+    Works like get_client_with_favorites_json, without the client's own fields.
+
+    Args:
+        db: The asynchronous database session.
+        client_id: The UUID of the client.
+
+    Returns:
+        The client's current version, and the JSON of its favorites ordered by product id.
+
+    Raises:
+        HTTPException: If the client with the given client_id is not found (status_code 404).
+    """
+    row, favorites = await _select_client_favorite_fragments(db, client_id)
+    return row.version, json_bytes(favorites)
+
+async def get_favorites_for_clients_json(db: AsyncSession, client_ids: List[uuid.UUID]) -> bytes:
+    """
+    Retrieves the formatted favorites of several clients at once, serialized as a mapping
+    from client UUID to a list of FavoriteProductDisplay.
+
+    Every association row is read with a single join on products_ref, the products that
+    need the product service are resolved once for all clients, and the cached JSON of
+    each favorite is joined as it is.
+
+    Args:
+        db: The asynchronous database session.
+        client_ids: The UUIDs of the clients.
+
+    Returns:
+        The JSON of a mapping from each existing client's UUID to its favorites, ordered by
+        product id. Clients that do not exist are not in the mapping.
+    """
     result = await db.execute(
-        select(ClientModel)
-        .options(selectinload(ClientModel.favorite_products))
-        .filter(ClientModel.id == client_id)
+        select(ClientModel.id.label("client_id"), *FAVORITE_ROW_COLUMNS)
+        .select_from(ClientModel)
+        .outerjoin(client_favorite_products_table, client_favorite_products_table.c.client_id == ClientModel.id)
+        .outerjoin(ProductRefModel, ProductRefModel.id == client_favorite_products_table.c.product_ref_id)
+        .filter(ClientModel.id.in_(set(client_ids)))
+        .order_by(ClientModel.id, client_favorite_products_table.c.product_ref_id)
     )
-    client = result.scalars().first()
+    rows = result.all()
 
-    if not client:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    displays_by_id = await _resolve_favorite_displays(rows)
+    favorites_by_client: Dict[str, List[orjson.Fragment]] = {}
+    for row in rows:
+        favorites = favorites_by_client.setdefault(str(row.client_id), [])
+        if row.product_id in displays_by_id:
+            favorites.append(orjson.Fragment(displays_by_id[row.product_id].json))
+    return json_bytes(favorites_by_client)
 
-    favorite_product_details: List[FavoriteProductDisplay] = []
-    product_ids_to_fetch: List[int] = [fav_prod_ref.id for fav_prod_ref in client.favorite_products]
+def _select_product_fans(product_id: int, after_id: Optional[uuid.UUID] = None):
+    """
+    Selects the clients who favorited a product, ordered by client id.
 
-    if not product_ids_to_fetch:
-        return []
+    Both the filter and the order come from the (product_ref_id, client_id) index, so
+    reading a page costs the same however many clients favorited the product.
+    """
+    query = (
+        select(ClientModel.id, ClientModel.name, ClientModel.email, ClientModel.updated_at)
+        .select_from(client_favorite_products_table)
+        .join(ClientModel, ClientModel.id == client_favorite_products_table.c.client_id)
+        .filter(client_favorite_products_table.c.product_ref_id == product_id)
+        .order_by(client_favorite_products_table.c.client_id)
+    )
+    if after_id is not None:
+        query = query.filter(client_favorite_products_table.c.client_id > after_id)
+    return query
 
-    tasks = [product_service.get_cached_product_by_id(pid) for pid in product_ids_to_fetch]
-    external_product_results = await asyncio.gather(*tasks, return_exceptions=True)
+async def get_product_fans_page(
+    db: AsyncSession,
+    product_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    Returns a page of the clients who favorited a product, using keyset (cursor) pagination.
 
-    for i, product_data_or_exc in enumerate(external_product_results):
-        if isinstance(product_data_or_exc, Exception):
-            print(f"Error fetching details for product_id {product_ids_to_fetch[i]}: {product_data_or_exc}")
-            continue
-        
-        product_data: Optional[ProductExternal] = product_data_or_exc
-        if product_data:
-            review_rate_value = None
-            review_count_value = None
-            if product_data.rating:
-                review_rate_value = product_data.rating.rate
-                review_count_value = product_data.rating.count
-
-            favorite_product_details.append(
-                FavoriteProductDisplay(
-                    id=product_data.id,
-                    title=product_data.title,
-                    image=product_data.image,
-                    price=product_data.price,
-                    review=review_rate_value,
-                    review_count=review_count_value
-                )
-            )
-    return favorite_product_details
\ No newline at end of file
+    Args:
+        db: The asynchronous database session.
+        product_id: The ID of the product.
+        cursor: The next_cursor returned with the previous page, or None for the first page.
+        limit: Maximum number of clients in the page.
+
+    Returns:
+        A tuple with the clients of the page, ordered by id, and the cursor for the next
+        page (None when this is the last page).
+
+    Raises:
+        HTTPException (status_code 400): If the cursor is invalid or was created for another product.
+    """
+    after_id = None
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            if position.get("p") != product_id:
+                raise ValueError("cursor created for a different product")
+            after_id = uuid.UUID(position["i"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    result = await db.execute(_select_product_fans(product_id, after_id).limit(limit + 1))
+    clients = list(result.all())
+
+    next_cursor = None
+    if len(clients) > limit:
+        clients = clients[:limit]
+        next_cursor = encode_cursor({"p": product_id, "i": str(clients[-1].id)})
+    return clients, next_cursor
+
+async def get_product_favorite_count(db: AsyncSession, product_id: int) -> int:
+    """Returns how many clients favorited a product, from the favorite_count counter of products_ref."""
+    result = await db.execute(select(ProductRefModel.favorite_count).filter(ProductRefModel.id == product_id))
+    return result.scalar() or 0
+
+async def stream_product_fans(
+    db: AsyncSession,
+    product_id: int,
+    after_id: Optional[uuid.UUID] = None
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Streams every client who favorited a product, ordered by id, in chunks, through a
+    server-side cursor.
+
+    Args:
+        db: The asynchronous database session. It must stay open while the stream is consumed.
+        product_id: The ID of the product.
+        after_id: Resumes after this client id (the last id already received).
+
+    Yields:
+        Lists of rows with id, name, email and updated_at, CLIENT_EXPORT_BATCH_SIZE at a time.
+    """
+    result = await db.stream(
+        _select_product_fans(product_id, after_id).execution_options(yield_per=settings.CLIENT_EXPORT_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield rows
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from sqlalchemy import update, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
+
+from app.models.product import Product as ProductRefModel
+from app.schemas.product import ProductExternal
+from app.services import product_service
+
+products_ref_table = ProductRefModel.__table__
+
+PRODUCT_REF_DISPLAY_COLUMNS = ("title", "price", "image", "category", "rating_rate", "rating_count", "fetched_at")
+
+def product_ref_display_fields(product: ProductExternal) -> Dict[str, Any]:
+    """
+    Returns the products_ref column values that store the display data of a product.
+
+    Args:
+        product: The product as returned by the external API.
+
+    Returns:
+        A dict keyed by products_ref column name, with fetched_at set to the current time.
+    """
+    return {
+        "title": product.title,
+        "price": product.price,
+        "image": str(product.image) if product.image else None,
+        "category": product.category,
+        "rating_rate": product.rating.rate if product.rating else None,
+        "rating_count": product.rating.count if product.rating else None,
+        "fetched_at": datetime.now(timezone.utc),
+    }
+
+async def sync_product_catalog(db: AsyncSession) -> int:
+    """
+    Refreshes the display fields of every referenced product from the external catalog.
+
+    The whole catalog is fetched with a single call and applied with one executemany
+    UPDATE. Only products already present in products_ref are touched; products that
+    disappeared from the catalog keep their last known data.
+
+    Args:
+        db: The asynchronous database session.
+
+    Returns:
+        The number of catalog products sent to the database.
+    """
+    products = await product_service.refresh_all_products()
+    if not products:
+        return 0
+
+    rows = [
+        {"b_id": product.id, **{f"b_{column}": value for column, value in product_ref_display_fields(product).items()}}
+        for product in products
+    ]
+    stmt = (
+        update(products_ref_table)
+        .where(products_ref_table.c.id == bindparam("b_id"))
+        .values({column: bindparam(f"b_{column}") for column in PRODUCT_REF_DISPLAY_COLUMNS})
+    )
+    await db.execute(stmt, rows)
+    await db.commit()
+    return len(rows)
\ No newline at end of file
@@ -1,16 +1,83 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from app.core import metrics, profiling
 from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.core.security import close_password_hashing_pool, get_current_admin_user
+from app.routers import analytics as analytics_router
 from app.routers import auth as auth_router
+from app.routers import changes as changes_router
 from app.routers import clients as clients_router
 from app.routers import favorites as favorites_router
+from app.routers import monitoring as monitoring_router
+from app.routers import products as products_router
+from app.crud import analytics as crud_analytics
+from app.crud import change as crud_change
+from app.crud import product as crud_product
+from app.services import change_feed, product_service, scheduler
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await product_service.start_http_client()
+    await product_service.start_shared_cache()
+    scheduler.start_periodic_db_job(
+        "product_catalog_sync",
+        settings.PRODUCT_CATALOG_SYNC_INTERVAL_SECONDS,
+        crud_product.sync_product_catalog
+    )
+    scheduler.start_periodic_db_job(
+        "favorite_counts_reconcile",
+        settings.FAVORITE_COUNTS_RECONCILE_INTERVAL_SECONDS,
+        crud_analytics.reconcile_favorite_counts
+    )
+    scheduler.start_periodic_db_job(
+        "client_changes_prune",
+        settings.CHANGE_FEED_PRUNE_INTERVAL_SECONDS,
+        crud_change.prune_client_changes
+    )
+    change_feed.start_change_feed()
+    try:
+        yield
+    finally:
+        await change_feed.stop_change_feed()
+        await scheduler.stop_periodic_jobs()
+        await product_service.close_shared_cache()
+        await product_service.close_http_client()
+        close_password_hashing_pool()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     description="API para gerenciar clientes e sua lista de produtos favoritos.",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+if settings.PROFILING_ENABLED:
+    if profiling.Profiler is None:
+        print("Request profiling is enabled but pyinstrument is not installed.")
+    else:
+        app.add_middleware(profiling.ProfilingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get(
+        "/metrics",
+        response_class=PlainTextResponse,
+        include_in_schema=False,
+        dependencies=[Depends(get_current_admin_user)]
+    )
+    async def read_metrics():
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth_router.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Autenticação por token JWT"])
 app.include_router(clients_router.router, prefix=settings.API_V1_STR)
-app.include_router(favorites_router.router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(favorites_router.router, prefix=settings.API_V1_STR)
+app.include_router(favorites_router.batch_router, prefix=settings.API_V1_STR)
+app.include_router(products_router.router, prefix=settings.API_V1_STR)
+app.include_router(analytics_router.router, prefix=settings.API_V1_STR)
+app.include_router(changes_router.router, prefix=settings.API_V1_STR)
+app.include_router(monitoring_router.router, prefix=settings.API_V1_STR)
\ No newline at end of file
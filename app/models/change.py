@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, DDL, Integer, String, event, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from app.core.database import Base
+
+CLIENT_CHANGES_CHANNEL = "client_changes"
+# The sequence behind ClientChange.id (BIGSERIAL), read to know the last id ever issued.
+CLIENT_CHANGES_ID_SEQUENCE = "client_changes_id_seq"
+
+class ClientChange(Base):
+    """A change to a client or its favorites, kept for the change feed."""
+    __tablename__ = "client_changes"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # No foreign key: the change that deleted a client outlives it.
+    client_id = Column(UUID(as_uuid=True), nullable=False)
+    type = Column(String, nullable=False)
+    version = Column(Integer, nullable=True)
+    data = Column(JSONB(none_as_null=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True, nullable=False)
+
+# Wakes the change feed listeners when the inserting transaction commits. Notifications with
+# the same payload are folded into one per transaction, so a bulk insert sends a single one.
+event.listen(ClientChange.__table__, "after_create", DDL(f"""
+CREATE OR REPLACE FUNCTION notify_client_changes() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CLIENT_CHANGES_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""))
+event.listen(ClientChange.__table__, "after_create", DDL(
+    "CREATE TRIGGER client_changes_notify AFTER INSERT ON client_changes "
+    "FOR EACH STATEMENT EXECUTE FUNCTION notify_client_changes()"
+))
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Table, ForeignKey, Integer
+from sqlalchemy import Column, String, Table, ForeignKey, Integer, Index, DateTime, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
@@ -7,19 +7,33 @@ from app.core.database import Base
 client_favorite_products_table = Table(
     'client_favorite_products', Base.metadata,
     Column('client_id', UUID(as_uuid=True), ForeignKey('clients.id', ondelete="CASCADE"), primary_key=True),
-    Column('product_ref_id', Integer, ForeignKey('products_ref.id', ondelete="CASCADE"), primary_key=True)
+    Column('product_ref_id', Integer, ForeignKey('products_ref.id', ondelete="CASCADE"), primary_key=True),
+    Index("ix_client_favorite_products_product_ref_id_client_id", "product_ref_id", "client_id")
 )
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_name_id", "name", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True, nullable=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    favorite_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     favorite_products = relationship(
         "Product",
         secondary=client_favorite_products_table,
         collection_class=set,
-        lazy="selectin"
-    )
\ No newline at end of file
+        lazy="raise_on_sql",
+        passive_deletes=True
+    )
+
+Index("ix_clients_favorite_count_id", Client.favorite_count.desc(), Client.id)
+Index("ix_clients_email_lower_id", func.lower(Client.email).collate("C"), Client.id)
+# The trigram index used by the fuzzy name search (ix_clients_name_trgm) needs the pg_trgm
+# extension, so it is only created by migrations/007_clients_search_indexes.sql.
@@ -1,6 +1,16 @@
-from sqlalchemy import Column, Integer
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from app.core.database import Base
 
 class Product(Base):
     __tablename__ = "products_ref"
-    id = Column(Integer, primary_key=True, index=True, autoincrement=False)
\ No newline at end of file
+    id = Column(Integer, primary_key=True, index=True, autoincrement=False)
+    title = Column(String, nullable=True)
+    price = Column(Float, nullable=True)
+    image = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    rating_rate = Column(Float, nullable=True)
+    rating_count = Column(Integer, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=True)
+    favorite_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+Index("ix_products_ref_favorite_count_id", Product.favorite_count.desc(), Product.id)
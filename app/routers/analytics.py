@@ -0,0 +1,71 @@
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.crud import analytics as crud_analytics
+from app.schemas.analytics import ClientFavoriteCount, ProductFavoriteCount
+from app.core.database import get_read_db
+from app.core.security import get_current_admin_user
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Estatísticas dos produtos favoritos"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+@router.get("/top-products", response_model=List[ProductFavoriteCount], summary="Retorna os produtos mais favoritados")
+async def admin_read_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna o ranking dos produtos que aparecem em mais listas de favoritos.
+
+    O ranking é lido de um contador mantido a cada alteração das listas, sem contar os favoritos a cada chamada.
+
+    Argumentos:
+        limit: Quantidade de produtos do ranking
+
+    Retorna:
+        200 = Uma lista de objetos ProductFavoriteCount, do mais favoritado para o menos favoritado.
+        422 = Erro de validação nos campos
+    """
+    return await crud_analytics.get_top_products(db, limit=limit)
+
+@router.get("/top-clients", response_model=List[ClientFavoriteCount], summary="Retorna os clientes com mais favoritos")
+async def admin_read_top_clients(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna os clientes com as maiores listas de favoritos.
+
+    Argumentos:
+        limit: Quantidade de clientes do ranking
+
+    Retorna:
+        200 = Uma lista de objetos ClientFavoriteCount, da maior lista para a menor.
+        422 = Erro de validação nos campos
+    """
+    return await crud_analytics.get_top_clients(db, limit=limit)
+
+@router.get("/clients/{client_id}", response_model=ClientFavoriteCount, summary="Retorna a quantidade de favoritos de um cliente")
+async def admin_read_client_favorite_count(
+    client_id: uuid.UUID = Path(..., description="The UUID of the client"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna quantos produtos um cliente tem na sua lista de favoritos.
+
+    Argumentos:
+        client_id: UUID do cliente
+
+    Retorna:
+        200 = Um objeto ClientFavoriteCount
+        404 = Cliente não existe
+    """
+    client_count = await crud_analytics.get_client_favorite_count(db, client_id=client_id)
+    if client_count is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    return client_count
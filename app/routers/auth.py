@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.token import Token
 from app.schemas.auth import MasterLoginRequest
-from app.core.security import create_access_token, verify_password
+from app.core.security import create_access_token, verify_password_async
 from app.core.config import settings
 
 router = APIRouter()
@@ -16,12 +16,14 @@ async def master_login_for_access_token(
     username: favorite_products_admin
     password: favorite_procusts_password
 
+    A senha é verificada em um pool de threads limitado; se muitos logins estiverem em andamento, retorna 503.
+
     Retorna:
     Um objeto de token com o token e o tipo (Bearer).
 
     """
     if form_data.username != settings.MASTER_USERNAME or \
-       not verify_password(form_data.password, settings.MASTER_PASSWORD_HASH):
+       not await verify_password_async(form_data.password, settings.MASTER_PASSWORD_HASH):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect admin username or password",
@@ -0,0 +1,53 @@
+import uuid
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from app.core.security import get_current_admin_user
+from app.services import change_feed
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["Feed de alterações dos clientes"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+@router.get("/", response_class=StreamingResponse, summary="Acompanha as alterações dos clientes e dos seus favoritos")
+async def admin_stream_changes(
+    after_id: Optional[int] = Query(None, ge=0, description="Retoma o feed após este id de alteração"),
+    client_id: Optional[List[uuid.UUID]] = Query(None, description="Envia somente as alterações destes clientes"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", ge=0),
+):
+    """
+    Envia, como server-sent events (text/event-stream), cada alteração de cliente e da sua lista de
+    favoritos assim que ela é confirmada no banco de dados, em substituição à consulta periódica de
+    GET /clients/{client_id}/favorites.
+
+    Cada evento tem o id da alteração, o tipo (client.created, client.updated, client.deleted ou
+    favorites.changed) e um JSON compacto com o client_id, a nova versão do cliente e, em
+    favorites.changed, os ids dos produtos adicionados e removidos. As alterações são registradas na
+    tabela client_changes na mesma transação que as produz e chegam a todos os workers por
+    LISTEN/NOTIFY do Postgres.
+
+    Argumentos:
+        after_id: Id da última alteração recebida. Omitido, somente as novas alterações são enviadas.
+        client_id: Filtra as alterações por cliente. Pode ser repetido.
+        Last-Event-ID: Enviado pelo EventSource ao reconectar; tem precedência sobre after_id.
+
+    Retorna:
+        200 = O feed, enviado enquanto a conexão estiver aberta. Se as alterações após o id informado já
+              foram descartadas, o primeiro evento é "reset" e os dados devem ser recarregados.
+        503 = O feed de alterações não está disponível neste momento
+        422 = Erro de validação nos campos
+    """
+    if not change_feed.is_running():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Change feed is not available.",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        change_feed.stream_changes(after_id=last_event_id if last_event_id is not None else after_id, client_ids=client_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
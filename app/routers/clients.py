@@ -1,12 +1,15 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Path, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from app.crud import client as crud_client
 from app.crud import favorite as crud_favorite
-from app.schemas.client import Client, ClientCreate, ClientUpdate, ClientWithFavorites
-from app.core.database import get_db
+from app.schemas.client import Client, ClientCreate, ClientUpdate, ClientWithFavorites, ClientPage, ClientImportResult
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_admin_user
+from app.services import client_export, client_import, response_cache
 
 router = APIRouter(
     prefix="/clients",
@@ -33,11 +36,37 @@ async def admin_create_client(
     return await crud_client.create_client(db=db, client_in=client_in)
 
 
+@router.post("/import", response_model=ClientImportResult, summary="Importa clientes em lote a partir de um arquivo NDJSON ou CSV")
+async def admin_import_clients(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Importa clientes em lote. O corpo da requisição é o próprio arquivo, lido em streaming.
+
+    O formato é definido pelo Content-Type: application/x-ndjson (um objeto JSON com name e email por linha)
+    ou text/csv (com uma linha de cabeçalho contendo as colunas name e email).
+    Os clientes são inseridos em lotes, com poucas transações no banco de dados.
+
+    Retorna:
+        200 = Um objeto ClientImportResult com os totais e o resultado de cada linha: created, duplicate ou invalid.
+        415 = Content-Type não suportado
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = client_import.IMPORT_CONTENT_TYPES.get(content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type must be application/x-ndjson or text/csv."
+        )
+    return await client_import.import_clients(db, request.stream(), import_format)
+
+
 @router.get("/", response_model=List[Client], summary="Lista todos clientes cadastrados")
 async def admin_read_clients(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Retorna uma lista de todos clientes, utilizando paginação.
@@ -53,28 +82,123 @@ async def admin_read_clients(
     return await crud_client.get_clients(db, skip=skip, limit=limit)
 
 
+@router.get("/page", response_model=ClientPage, summary="Lista clientes com paginação por cursor")
+async def admin_read_clients_page(
+    cursor: Optional[str] = Query(None, description="O next_cursor retornado pela página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    sort: crud_client.ClientSort = "id",
+    include_total: bool = Query(False, description="Inclui o total aproximado de clientes"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna uma página de clientes utilizando paginação por cursor (keyset).
+
+    O tempo de resposta não cresce com a profundidade da página, ao contrário da paginação por skip.
+
+    Argumentos:
+        cursor: O next_cursor da página anterior. Omitido na primeira página.
+        limit: Limita a quantidade de clientes da página
+        sort: Ordenação estável por "id" ou por "name"
+        include_total: Inclui a estimativa do total de clientes, obtida das estatísticas do PostgreSQL
+
+    Retorna:
+        200 = Um objeto ClientPage com os clientes e o next_cursor (nulo na última página). Não incluí os favoritos.
+        400 = Cursor inválido ou criado com outra ordenação
+        422 = Erro de validação nos campos
+    """
+    clients, next_cursor = await crud_client.get_clients_page(db, sort=sort, cursor=cursor, limit=limit)
+    approximate_total = await crud_client.get_approximate_client_count(db) if include_total else None
+    return ClientPage(items=clients, next_cursor=next_cursor, approximate_total=approximate_total)
+
+
+@router.get("/search", response_model=ClientPage, summary="Busca clientes pelo início do email ou por nome aproximado")
+async def admin_search_clients(
+    email: Optional[str] = Query(None, min_length=1, max_length=254, description="Início do email, sem diferenciar maiúsculas"),
+    name: Optional[str] = Query(None, min_length=3, max_length=100, description="Nome ou parte do nome, com busca aproximada"),
+    cursor: Optional[str] = Query(None, description="O next_cursor retornado pela página anterior"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Busca clientes pelo início do email ou por nome aproximado, utilizando paginação por cursor.
+
+    A busca por email retorna os clientes cujo email começa com o texto informado, em ordem de email.
+    A busca por nome tolera erros de digitação e retorna os nomes mais parecidos primeiro, até
+    CLIENT_SEARCH_MAX_RESULTS resultados. As duas buscas usam índices próprios e não percorrem a tabela.
+
+    Argumentos:
+        email: Início do email (ex.: "maria.s")
+        name: Nome ou parte do nome, com pelo menos 3 caracteres
+        cursor: O next_cursor da página anterior. Omitido na primeira página.
+        limit: Limita a quantidade de clientes da página
+
+    Retorna:
+        200 = Um objeto ClientPage com os clientes encontrados e o next_cursor (nulo quando não há mais resultados). Não incluí os favoritos.
+        400 = Nenhum ou ambos os filtros informados, ou cursor inválido ou criado para outra busca
+        422 = Erro de validação nos campos
+    """
+    clients, next_cursor = await crud_client.search_clients(db, email_prefix=email, name=name, cursor=cursor, limit=limit)
+    return ClientPage(items=clients, next_cursor=next_cursor)
+
+@router.get("/export", response_class=StreamingResponse, summary="Exporta todos clientes em NDJSON ou CSV")
+async def admin_export_clients(
+    export_format: client_export.ExportFormat = Query("ndjson", alias="format"),
+    include_favorites: bool = Query(False, description="Inclui os IDs dos produtos favoritos de cada cliente"),
+    after_id: Optional[uuid.UUID] = Query(None, description="Retoma a exportação após este UUID de cliente"),
+    updated_since: Optional[datetime] = Query(None, description="Exporta apenas clientes criados ou alterados a partir desta data"),
+):
+    """
+    Exporta todos os clientes em streaming, ordenados pelo UUID, sem carregar a tabela inteira em memória.
+
+    Argumentos:
+        format: "ndjson" (um objeto JSON por linha) ou "csv"
+        include_favorites: Inclui a lista de IDs dos produtos favoritos de cada cliente
+        after_id: UUID do último cliente recebido, para retomar uma exportação interrompida
+        updated_since: Filtra clientes criados ou alterados (inclusive seus favoritos) a partir desta data
+
+    Retorna:
+        200 = O arquivo de exportação, enviado em partes conforme é lido do banco de dados.
+        422 = Erro de validação nos campos
+    """
+    return StreamingResponse(
+        client_export.stream_client_export(
+            export_format,
+            include_favorites=include_favorites,
+            after_id=after_id,
+            updated_since=updated_since
+        ),
+        media_type=client_export.EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="clients.{export_format}"'}
+    )
+
+
 @router.get("/{client_id}", response_model=ClientWithFavorites, summary="Retorna todas informações de um cliente")
 async def admin_read_client(
     client_id: uuid.UUID = Path(..., description="The UUID of the client to retrieve"),
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Retorna todas informações de um cliente específico, incluindo a lista de produtos favoritos.
 
+    A resposta traz um ETag; enviando-o de volta no cabeçalho If-None-Match, a API responde 304 se o cliente não mudou.
+
     Argumentos:
         client_id: o UUID do cliente
 
     Retorna:
         200 = Um objeto ClientWithFavorites, que consiste nas informações do cliente e sua lista de produtos favoritos.
+        304 = O cliente não mudou desde o ETag enviado
+        404 = Cliente não existe
         422 = Erro de validação nos campos
     """
-    db_client = await crud_client.get_client(db, client_id=client_id)
-    if db_client is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    async def render():
+        return await crud_favorite.get_client_with_favorites_json(db=db, client_id=client_id)
+
+    async def load_version():
+        return await crud_client.get_client_version(db=db, client_id=client_id)
 
-    favorites_list = await crud_favorite.get_formatted_favorites_for_client(db=db, client_id=client_id)
-    client_schema_data = Client.model_validate(db_client)
-    return ClientWithFavorites(**client_schema_data.model_dump(), favorites=favorites_list)
+    return await response_cache.conditional_client_response("client", client_id, if_none_match, render, load_version)
 
 
 @router.put("/{client_id}", response_model=Client, summary="Atualiza as informações de um cliente")
@@ -116,7 +240,7 @@ async def admin_delete_client(
     Retorna:
         204 = Deletou com sucesso
     """
-    deleted_client = await crud_client.delete_client(db=db, client_id=client_id)
-    if deleted_client is None:
+    deleted_client_id = await crud_client.delete_client(db=db, client_id=client_id)
+    if deleted_client_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found to delete")
     return None
\ No newline at end of file
@@ -1,13 +1,17 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, Header, Response, status, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List, Optional
 
+from app.crud import client as crud_client
 from app.crud import favorite as crud_favorite
 from app.schemas.client import ClientWithFavorites
+from app.schemas.favorite import FavoriteBatchRequest, FavoriteBatchResult
 from app.schemas.product import FavoriteProductDisplay
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.responses import model_response
 from app.core.security import get_current_admin_user
+from app.services import response_cache
 
 router = APIRouter(
     prefix="/clients/{client_id}/favorites",
@@ -15,6 +19,12 @@ router = APIRouter(
     dependencies=[Depends(get_current_admin_user)]
 )
 
+batch_router = APIRouter(
+    prefix="/favorites",
+    tags=["Gerenciamento da lista de produtos favoritos"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
 @router.post("/{product_id}", response_model=ClientWithFavorites, status_code=status.HTTP_201_CREATED, summary="Adiciona um produto à lista de favoritos de um cliente")
 async def admin_add_product_to_favorites(
     client_id: uuid.UUID = Path(..., description="The UUID of the client"),
@@ -33,15 +43,8 @@ async def admin_add_product_to_favorites(
         404 = Cliente ou produto externo não existe
         400 = Produto já está presente na lista de favoritos do cliente
     """
-    try:
-        updated_client_model = await crud_favorite.add_favorite_product(db=db, client_id=client_id, product_id=product_id)
-    except HTTPException as e:
-        raise e
-
-    favorites_list = await crud_favorite.get_formatted_favorites_for_client(db=db, client_id=updated_client_model.id)
-    from app.schemas.client import Client as ClientSchema
-    client_schema_data = ClientSchema.model_validate(updated_client_model)
-    return ClientWithFavorites(**client_schema_data.model_dump(), favorites=favorites_list)
+    client_with_favorites = await crud_favorite.add_favorite_product(db=db, client_id=client_id, product_id=product_id)
+    return model_response(client_with_favorites, status_code=status.HTTP_201_CREATED)
 
 @router.delete("/{product_id}", response_model=ClientWithFavorites, summary="Deleta um produto da lista de favoritos do cliente")
 async def admin_remove_product_from_favorites(
@@ -60,32 +63,71 @@ async def admin_remove_product_from_favorites(
         200 = Um objeto ClientWithFavorites atualizado
         404 = Cliente não encontrado ou produto não está na lista do cliente
     """
-    try:
-        updated_client_model = await crud_favorite.remove_favorite_product(db=db, client_id=client_id, product_id=product_id)
-    except HTTPException as e:
-        raise e
-
-    favorites_list = await crud_favorite.get_formatted_favorites_for_client(db=db, client_id=updated_client_model.id)
-    from app.schemas.client import Client as ClientSchema
-    client_schema_data = ClientSchema.model_validate(updated_client_model)
-    return ClientWithFavorites(**client_schema_data.model_dump(), favorites=favorites_list)
+    return model_response(await crud_favorite.remove_favorite_product(db=db, client_id=client_id, product_id=product_id))
 
 @router.get("/", response_model=List[FavoriteProductDisplay], summary="Retorna uma lista de favoritos de um cliente")
 async def admin_list_client_favorites(
     client_id: uuid.UUID = Path(..., description="The UUID of the client"),
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Retorna uma lista de produtos favoritos de um cliente específico.
 
+    A resposta traz um ETag; enviando-o de volta no cabeçalho If-None-Match, a API responde 304 se a lista não mudou.
+
     Argumentos:
         client_id: UUID do cliente
 
     Retorna:
         200 = Uma lista de objetos FavoriteProductDisplay, contendo os detalhes de cada produto.
+        304 = A lista não mudou desde o ETag enviado
         404 = Cliente não existe
     """
-    try:
-        return await crud_favorite.get_formatted_favorites_for_client(db=db, client_id=client_id)
-    except HTTPException as e:
-        raise e
\ No newline at end of file
+    async def render():
+        return await crud_favorite.get_favorites_json(db=db, client_id=client_id)
+
+    async def load_version():
+        return await crud_client.get_client_version(db=db, client_id=client_id)
+
+    return await response_cache.conditional_client_response("favorites", client_id, if_none_match, render, load_version)
+
+
+@batch_router.post("/batch", response_model=FavoriteBatchResult, summary="Aplica várias alterações nas listas de favoritos de vários clientes")
+async def admin_apply_favorite_operations(
+    batch_in: FavoriteBatchRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Aplica, em uma única transação, uma lista de operações sobre os favoritos de vários clientes.
+
+    Cada operação é "add" (adiciona produtos), "remove" (remove produtos) ou "replace" (define a lista inteira),
+    e as operações são aplicadas na ordem enviada. Operações de clientes inexistentes ou com produtos
+    inexistentes são ignoradas e reportadas, sem impedir as demais.
+
+    Argumentos:
+        batch_in: Objeto FavoriteBatchRequest com a lista de operações
+
+    Retorna:
+        200 = Um objeto FavoriteBatchResult, com o total de favoritos adicionados e removidos e o status de cada operação
+        503 = A API externa de produtos não respondeu
+    """
+    return model_response(await crud_favorite.apply_favorite_operations(db=db, operations=batch_in.operations))
+
+@batch_router.get("/", response_model=Dict[uuid.UUID, List[FavoriteProductDisplay]], summary="Retorna as listas de favoritos de vários clientes")
+async def admin_list_favorites_for_clients(
+    client_ids: List[uuid.UUID] = Query(..., alias="client_id", min_length=1, max_length=200, description="The UUIDs of the clients"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna, em uma única chamada, os produtos favoritos de vários clientes.
+
+    Argumentos:
+        client_ids: UUIDs dos clientes, repetindo o parâmetro client_id (ex.: ?client_id=...&client_id=...)
+
+    Retorna:
+        200 = Um objeto que associa o UUID de cada cliente à sua lista de objetos FavoriteProductDisplay.
+              Clientes inexistentes não aparecem no resultado.
+    """
+    content = await crud_favorite.get_favorites_for_clients_json(db=db, client_ids=client_ids)
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from app.schemas.monitoring import PasswordHashingStats, ProductApiPoolStats
+from app.core.security import get_current_admin_user, get_password_hashing_stats
+from app.services import product_service
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["Monitoramento"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+@router.get("/product-api-pool", response_model=ProductApiPoolStats, summary="Retorna estatísticas do pool de conexões com a API de produtos")
+async def admin_read_product_api_pool_stats():
+    """
+    Retorna o uso do pool de conexões HTTP compartilhado com a FakeStoreAPI.
+
+    Retorna:
+        200 = Quantidade de requisições enviadas, conexões abertas e conexões reaproveitadas (keep-alive).
+    """
+    return product_service.get_http_pool_stats()
+
+@router.get("/password-hashing", response_model=PasswordHashingStats, summary="Retorna estatísticas da verificação de senhas")
+async def admin_read_password_hashing_stats():
+    """
+    Retorna o uso do pool de threads que executa o bcrypt nos logins.
+
+    Retorna:
+        200 = Quantidade de verificações executadas e recusadas por saturação, e o tempo total gasto com hashing.
+    """
+    return get_password_hashing_stats()
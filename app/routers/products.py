@@ -0,0 +1,73 @@
+import uuid
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.crud import favorite as crud_favorite
+from app.schemas.client import ClientPage
+from app.core.database import get_read_db
+from app.core.security import get_current_admin_user
+from app.services import client_export
+
+router = APIRouter(
+    prefix="/products",
+    tags=["Clientes que favoritaram um produto"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+@router.get("/{product_id}/favorited-by", response_model=ClientPage, summary="Lista os clientes que favoritaram um produto")
+async def admin_read_product_fans(
+    product_id: int = Path(..., description="The ID of the product"),
+    cursor: Optional[str] = Query(None, description="O next_cursor retornado pela página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    include_total: bool = Query(False, description="Inclui o total de clientes que favoritaram o produto"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Retorna uma página dos clientes que têm o produto na sua lista de favoritos, ordenados pelo UUID,
+    utilizando paginação por cursor (keyset).
+
+    A consulta usa o índice (product_ref_id, client_id), então o tempo de resposta não cresce com a
+    quantidade de clientes que favoritaram o produto nem com a profundidade da página.
+
+    Argumentos:
+        product_id: ID do produto
+        cursor: O next_cursor da página anterior. Omitido na primeira página.
+        limit: Limita a quantidade de clientes da página
+        include_total: Inclui o total de clientes que favoritaram o produto, lido do contador de favoritos
+
+    Retorna:
+        200 = Um objeto ClientPage com os clientes e o next_cursor (nulo na última página). Produtos que
+              ninguém favoritou retornam uma página vazia.
+        400 = Cursor inválido ou criado para outro produto
+        422 = Erro de validação nos campos
+    """
+    clients, next_cursor = await crud_favorite.get_product_fans_page(db, product_id, cursor=cursor, limit=limit)
+    approximate_total = await crud_favorite.get_product_favorite_count(db, product_id) if include_total else None
+    return ClientPage(items=clients, next_cursor=next_cursor, approximate_total=approximate_total)
+
+
+@router.get("/{product_id}/favorited-by/export", response_class=StreamingResponse, summary="Exporta os clientes que favoritaram um produto")
+async def admin_export_product_fans(
+    product_id: int = Path(..., description="The ID of the product"),
+    export_format: client_export.ExportFormat = Query("ndjson", alias="format"),
+    after_id: Optional[uuid.UUID] = Query(None, description="Retoma a exportação após este UUID de cliente"),
+):
+    """
+    Exporta em streaming todos os clientes que favoritaram o produto, ordenados pelo UUID, sem carregá-los em memória.
+
+    Argumentos:
+        product_id: ID do produto
+        format: "ndjson" (um objeto JSON por linha) ou "csv"
+        after_id: UUID do último cliente recebido, para retomar uma exportação interrompida
+
+    Retorna:
+        200 = O arquivo de exportação, enviado em partes conforme é lido do banco de dados.
+        422 = Erro de validação nos campos
+    """
+    return StreamingResponse(
+        client_export.stream_product_fan_export(product_id, export_format, after_id=after_id),
+        media_type=client_export.EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="product-{product_id}-clients.{export_format}"'}
+    )
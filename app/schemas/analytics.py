@@ -0,0 +1,20 @@
+import uuid
+from pydantic import BaseModel
+from typing import Optional
+
+class ProductFavoriteCount(BaseModel):
+    product_id: int
+    title: Optional[str] = None
+    favorite_count: int
+
+    class Config:
+        from_attributes = True
+
+class ClientFavoriteCount(BaseModel):
+    client_id: uuid.UUID
+    name: str
+    email: str
+    favorite_count: int
+
+    class Config:
+        from_attributes = True
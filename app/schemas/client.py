@@ -1,6 +1,6 @@
 import uuid
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from app.schemas.product import FavoriteProductDisplay
 
 class ClientBase(BaseModel):
@@ -21,4 +21,22 @@ class Client(ClientBase):
         from_attributes = True
 
 class ClientWithFavorites(Client):
-    favorites: List[FavoriteProductDisplay] = []
\ No newline at end of file
+    favorites: List[FavoriteProductDisplay] = []
+
+class ClientPage(BaseModel):
+    items: List[Client]
+    next_cursor: Optional[str] = None
+    approximate_total: Optional[int] = None
+
+class ClientImportRowResult(BaseModel):
+    line: int
+    status: Literal["created", "duplicate", "invalid"]
+    email: Optional[str] = None
+    id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+class ClientImportResult(BaseModel):
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    results: List[ClientImportRowResult] = []
\ No newline at end of file
@@ -0,0 +1,20 @@
+import uuid
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+class FavoriteOperation(BaseModel):
+    op: Literal["add", "remove", "replace"]
+    client_id: uuid.UUID
+    product_ids: List[int] = Field(..., max_length=500)
+
+class FavoriteBatchRequest(BaseModel):
+    operations: List[FavoriteOperation] = Field(..., min_length=1, max_length=5000)
+
+class FavoriteOperationResult(BaseModel):
+    status: Literal["applied", "client_not_found", "invalid_products"]
+    invalid_product_ids: List[int] = []
+
+class FavoriteBatchResult(BaseModel):
+    added: int = 0
+    removed: int = 0
+    results: List[FavoriteOperationResult] = []
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+class ProductApiPoolStats(BaseModel):
+    requests: int
+    connections_opened: int
+    connections_reused: int
+    http2_responses: int
+    max_connections: int
+    max_keepalive_connections: int
+
+class PasswordHashingStats(BaseModel):
+    calls: int
+    rejected: int
+    seconds: float
+    pool_size: int
+    max_pending: int
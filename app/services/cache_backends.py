@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional
+
+class SharedCacheEntry(NamedTuple):
+    key: str
+    value: bytes
+    fresh_until: float
+    stale_until: float
+
+class CacheBackend(ABC):
+    """
+    Interface of a cache shared by every worker process.
+
+    Values are opaque bytes, and the freshness timestamps are wall-clock epoch seconds so
+    they mean the same thing in every process. Implementations must make each write
+    atomic, so a reader in another process sees either the old entry or the new one.
+    A Redis-compatible store can be plugged in by implementing these methods.
+    """
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> Dict[str, SharedCacheEntry]:
+        """Returns the entries found for the given keys that have not passed their stale_until."""
+
+    @abstractmethod
+    async def set_many(self, entries: List[SharedCacheEntry]) -> None:
+        """Writes (or replaces) all the given entries in a single atomic operation."""
+
+    @abstractmethod
+    async def load_all(self) -> List[SharedCacheEntry]:
+        """Returns every entry that has not passed its stale_until, used to warm a new worker."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Releases the connection or any other resource held by the backend."""
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Shared cache stored in a SQLite file on local disk.
+
+    The database runs in WAL mode so readers never block the writer, and every write is a
+    single transaction. SQLite calls are blocking, so they run in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+
+    def _get_many(self, keys: List[str]) -> Dict[str, SharedCacheEntry]:
+        placeholders = ", ".join("?" for _ in keys)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT key, value, fresh_until, stale_until FROM cache_entries "
+                f"WHERE key IN ({placeholders}) AND stale_until > ?",
+                (*keys, time.time())
+            ).fetchall()
+        return {row[0]: SharedCacheEntry(*row) for row in rows}
+
+    def _set_many(self, entries: List[SharedCacheEntry]) -> None:
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "INSERT INTO cache_entries (key, value, fresh_until, stale_until) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                    "fresh_until = excluded.fresh_until, stale_until = excluded.stale_until",
+                    entries
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def _load_all(self) -> List[SharedCacheEntry]:
+        now = time.time()
+        with self._lock:
+            self._connection.execute("DELETE FROM cache_entries WHERE stale_until <= ?", (now,))
+            rows = self._connection.execute(
+                "SELECT key, value, fresh_until, stale_until FROM cache_entries"
+            ).fetchall()
+        return [SharedCacheEntry(*row) for row in rows]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, SharedCacheEntry]:
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, entries: List[SharedCacheEntry]) -> None:
+        if entries:
+            await asyncio.to_thread(self._set_many, entries)
+
+    async def load_all(self) -> List[SharedCacheEntry]:
+        return await asyncio.to_thread(self._load_all)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+def create_cache_backend(backend_name: str, sqlite_path: str) -> Optional[CacheBackend]:
+    """
+    Builds the shared cache backend named in the settings.
+
+    Returns:
+        The backend, or None when the product cache should stay in process memory only.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend_name == "none":
+        return None
+    if backend_name == "sqlite":
+        return SQLiteCacheBackend(sqlite_path)
+    raise ValueError(f"Unknown product cache backend: {backend_name}")
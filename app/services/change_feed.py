@@ -0,0 +1,237 @@
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Dict, FrozenSet, NamedTuple, Optional, Sequence, Set
+
+import orjson
+from sqlalchemy.engine import Row
+
+from app.core.config import settings
+from app.core.database import AsyncSessionFactory, async_engine
+from app.crud import change as crud_change
+from app.models.change import CLIENT_CHANGES_CHANNEL
+from app.services import response_cache
+
+class ChangeEvent(NamedTuple):
+    id: int
+    client_id: uuid.UUID
+    # The event already encoded for the text/event-stream format.
+    message: bytes
+
+class _Subscriber:
+    """A connected stream: the events waiting to be sent, and the clients it follows (all if None)."""
+
+    def __init__(self, client_ids: Optional[FrozenSet[uuid.UUID]]):
+        self.client_ids = client_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CHANGE_FEED_SUBSCRIBER_QUEUE_SIZE)
+        # Set when the queue overflowed and the subscriber was detached; the stream then
+        # catches up from the database.
+        self.overflowed = False
+
+HEARTBEAT_MESSAGE = b": keep-alive\n\n"
+RESET_MESSAGE = b"event: reset\ndata: {}\n\n"
+
+subscribers: Set[_Subscriber] = set()
+# Id of the last change delivered to this worker's subscribers. Changes are delivered in
+# id order, so every change up to it has either been delivered or was given up on.
+delivered_change_id: Optional[int] = None
+listener_task: Optional[asyncio.Task] = None
+changes_pending = asyncio.Event()
+# {first missing id: when the gap was first seen}
+gap_seen_at: Dict[int, float] = {}
+
+def encode_change(row: Row) -> bytes:
+    """Encodes a client_changes row as a server-sent event, with the change id as the event id."""
+    payload = {
+        "id": row.id,
+        "type": row.type,
+        "client_id": str(row.client_id),
+        "version": row.version,
+        "created_at": row.created_at,
+        **(row.data or {}),
+    }
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (row.id, row.type.encode(), orjson.dumps(payload))
+
+def _deliver(row: Row) -> None:
+    global delivered_change_id
+    if row.type == crud_change.CLIENT_DELETED:
+        response_cache.forget_client(row.client_id)
+    elif row.version is not None:
+        response_cache.set_client_version(row.client_id, row.version)
+
+    event = ChangeEvent(id=row.id, client_id=row.client_id, message=encode_change(row))
+    for subscriber in list(subscribers):
+        if subscriber.client_ids is not None and row.client_id not in subscriber.client_ids:
+            continue
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            subscriber.overflowed = True
+            subscribers.discard(subscriber)
+    delivered_change_id = row.id
+
+async def _deliver_new_changes() -> None:
+    """
+    Reads the changes committed since the last delivered one and delivers them in id order.
+
+    Ids are taken from a sequence when a change is inserted, so a transaction can commit
+    a change after another one with a greater id was already committed. A missing id is
+    waited for up to CHANGE_FEED_GAP_TIMEOUT_SECONDS before the changes after it are
+    delivered; a gap that stays open comes from a transaction that rolled back.
+    """
+    while True:
+        async with AsyncSessionFactory() as db:
+            rows = await crud_change.get_changes_after(db, delivered_change_id, settings.CHANGE_FEED_BATCH_SIZE)
+        for row in rows:
+            expected_id = delivered_change_id + 1
+            if row.id != expected_id:
+                first_seen_at = gap_seen_at.setdefault(expected_id, time.monotonic())
+                if time.monotonic() - first_seen_at < settings.CHANGE_FEED_GAP_TIMEOUT_SECONDS:
+                    return
+            gap_seen_at.clear()
+            _deliver(row)
+        if len(rows) < settings.CHANGE_FEED_BATCH_SIZE:
+            return
+
+def _on_notification(connection, pid, channel, payload) -> None:
+    changes_pending.set()
+
+async def _listen() -> None:
+    """
+    Keeps a connection LISTENing on the client_changes channel and delivers the changes.
+
+    The notifications only wake the loop up: the changes themselves are read from the
+    client_changes table, which is also polled every CHANGE_FEED_POLL_SECONDS so nothing
+    is missed while the connection is being re-established or a gap is being waited for.
+
+    On first start the feed begins CHANGE_FEED_GAP_TIMEOUT_SECONDS back (see
+    get_feed_start_id), so a change still uncommitted at that moment is not skipped when a
+    later one is already visible. The recent changes are delivered again, which refreshes
+    the response cache versions; a subscriber attaching in those first moments may also get
+    a few changes made just before it connected.
+    """
+    global delivered_change_id
+    while True:
+        try:
+            async with async_engine.connect() as connection:
+                raw_connection = await connection.get_raw_connection()
+                driver_connection = raw_connection.driver_connection
+                await driver_connection.add_listener(CLIENT_CHANGES_CHANNEL, _on_notification)
+                try:
+                    if delivered_change_id is None:
+                        async with AsyncSessionFactory() as db:
+                            delivered_change_id = await crud_change.get_feed_start_id(
+                                db, settings.CHANGE_FEED_GAP_TIMEOUT_SECONDS
+                            )
+                    while not driver_connection.is_closed():
+                        changes_pending.clear()
+                        await _deliver_new_changes()
+                        try:
+                            await asyncio.wait_for(changes_pending.wait(), settings.CHANGE_FEED_POLL_SECONDS)
+                        except asyncio.TimeoutError:
+                            pass
+                finally:
+                    if not driver_connection.is_closed():
+                        await driver_connection.remove_listener(CLIENT_CHANGES_CHANNEL, _on_notification)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Change feed listener failed, reconnecting: {e}")
+        await asyncio.sleep(settings.CHANGE_FEED_POLL_SECONDS)
+
+def start_change_feed() -> None:
+    """Starts listening for changes in this worker. Called when the application starts."""
+    global listener_task
+    if settings.CHANGE_FEED_ENABLED and listener_task is None:
+        listener_task = asyncio.get_running_loop().create_task(_listen())
+
+async def stop_change_feed() -> None:
+    """Stops listening and detaches every subscriber. Called when the application stops."""
+    global listener_task, delivered_change_id
+    if listener_task is not None:
+        listener_task.cancel()
+        await asyncio.gather(listener_task, return_exceptions=True)
+        listener_task = None
+    delivered_change_id = None
+    gap_seen_at.clear()
+    for subscriber in subscribers:
+        subscriber.overflowed = True
+    subscribers.clear()
+
+def is_running() -> bool:
+    """True once the listener has read where the feed starts."""
+    return delivered_change_id is not None
+
+async def _replay(after_id: int, up_to_id: int, client_ids: Optional[FrozenSet[uuid.UUID]]) -> AsyncIterator[ChangeEvent]:
+    """Reads the changes in (after_id, up_to_id] back from client_changes, one batch at a time."""
+    while after_id < up_to_id:
+        async with AsyncSessionFactory() as db:
+            rows = await crud_change.get_changes_after(
+                db, after_id, settings.CHANGE_FEED_BATCH_SIZE, up_to_id=up_to_id, client_ids=client_ids
+            )
+        if not rows:
+            return
+        for row in rows:
+            yield ChangeEvent(id=row.id, client_id=row.client_id, message=encode_change(row))
+        after_id = rows[-1].id
+
+async def stream_changes(
+    after_id: Optional[int] = None,
+    client_ids: Optional[Sequence[uuid.UUID]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Streams the changes to clients and their favorites as server-sent events.
+
+    The subscriber is attached to the live feed first, then the changes it missed are read
+    back from client_changes up to the last change delivered live, so none is lost or sent
+    twice. A subscriber too slow to keep up with its queue (CHANGE_FEED_SUBSCRIBER_QUEUE_SIZE
+    events) is detached and catches up from the table the same way. A comment line is sent
+    every CHANGE_FEED_HEARTBEAT_SECONDS so proxies keep the connection open.
+
+    Args:
+        after_id: Resume after this change id (the Last-Event-ID of a reconnecting client).
+            If None, only changes made from now on are sent. If changes after it were
+            already pruned, even when none is kept at all, a "reset" event is sent first:
+            the subscriber should reload its data.
+        client_ids: Only send the changes of these clients. All clients if empty.
+
+    Yields:
+        Events encoded for a text/event-stream response.
+    """
+    followed_client_ids = frozenset(client_ids) if client_ids else None
+    sent_id = after_id
+    if after_id is not None:
+        async with AsyncSessionFactory() as db:
+            first_kept_change_id = await crud_change.get_first_kept_change_id(db)
+        if after_id < first_kept_change_id - 1:
+            yield RESET_MESSAGE
+
+    while True:
+        subscriber = _Subscriber(followed_client_ids)
+        subscribers.add(subscriber)
+        try:
+            up_to_id = delivered_change_id
+            if up_to_id is None:
+                return
+            if sent_id is None:
+                sent_id = up_to_id
+            async for event in _replay(sent_id, up_to_id, followed_client_ids):
+                yield event.message
+            sent_id = max(sent_id, up_to_id)
+
+            while not (subscriber.overflowed and subscriber.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), settings.CHANGE_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if subscriber.overflowed:
+                        break
+                    yield HEARTBEAT_MESSAGE
+                    continue
+                if event.id <= sent_id:
+                    continue
+                yield event.message
+                sent_id = event.id
+        finally:
+            subscribers.discard(subscriber)
+        if listener_task is None:
+            return
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional, Sequence
+
+from sqlalchemy.engine import Row
+
+from app.core.database import read_session
+from app.crud import client as crud_client
+from app.crud import favorite as crud_favorite
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _render_ndjson(rows: Sequence[Row], include_favorites: bool) -> str:
+    lines = []
+    for row in rows:
+        record = {
+            "id": str(row.id),
+            "name": row.name,
+            "email": row.email,
+            "updated_at": row.updated_at.isoformat(),
+        }
+        if include_favorites:
+            record["favorite_product_ids"] = sorted(row.favorite_product_ids or [])
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+def _render_csv(rows: Sequence[Row], include_favorites: bool, include_header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_header:
+        header = ["id", "name", "email", "updated_at"]
+        if include_favorites:
+            header.append("favorite_product_ids")
+        writer.writerow(header)
+    for row in rows:
+        record = [row.id, row.name, row.email, row.updated_at.isoformat()]
+        if include_favorites:
+            record.append(" ".join(str(product_id) for product_id in sorted(row.favorite_product_ids or [])))
+        writer.writerow(record)
+    return buffer.getvalue()
+
+async def stream_client_export(
+    export_format: ExportFormat,
+    include_favorites: bool = False,
+    after_id: Optional[uuid.UUID] = None,
+    updated_since: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    """
+    Renders the client export as NDJSON or CSV, one chunk per database fetch.
+
+    The generator opens its own session because it is consumed by the StreamingResponse
+    after the request dependencies have been closed. Rows are ordered by id, so an
+    interrupted export is resumed by passing the last exported id as after_id.
+    """
+    include_header = export_format == "csv" and after_id is None
+    async with read_session() as db:
+        async for rows in crud_client.stream_clients_for_export(
+            db, include_favorites=include_favorites, after_id=after_id, updated_since=updated_since
+        ):
+            if export_format == "csv":
+                chunk = _render_csv(rows, include_favorites, include_header)
+                include_header = False
+            else:
+                chunk = _render_ndjson(rows, include_favorites)
+            yield chunk.encode()
+    if include_header:
+        yield _render_csv([], include_favorites, include_header=True).encode()
+
+async def stream_product_fan_export(
+    product_id: int,
+    export_format: ExportFormat,
+    after_id: Optional[uuid.UUID] = None
+) -> AsyncIterator[bytes]:
+    """
+    Renders the clients who favorited a product as NDJSON or CSV, one chunk per database fetch.
+
+    Works like stream_client_export, without the favorites column: rows are ordered by id
+    and an interrupted export is resumed by passing the last exported id as after_id.
+    """
+    include_header = export_format == "csv" and after_id is None
+    async with read_session() as db:
+        async for rows in crud_favorite.stream_product_fans(db, product_id, after_id=after_id):
+            if export_format == "csv":
+                chunk = _render_csv(rows, include_favorites=False, include_header=include_header)
+                include_header = False
+            else:
+                chunk = _render_ndjson(rows, include_favorites=False)
+            yield chunk.encode()
+    if include_header:
+        yield _render_csv([], include_favorites=False, include_header=True).encode()
@@ -0,0 +1,130 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Literal, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import client as crud_client
+from app.schemas.client import ClientCreate, ClientImportResult, ClientImportRowResult
+
+ImportFormat = Literal["ndjson", "csv"]
+
+IMPORT_CONTENT_TYPES: Dict[str, ImportFormat] = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Splits a streamed request body into numbered, non-empty text lines as the chunks arrive."""
+    buffer = b""
+    line_number = 0
+    async for chunk in body:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            text = line.decode("utf-8", errors="replace").strip()
+            if text:
+                yield line_number, text
+    line_number += 1
+    text = buffer.decode("utf-8", errors="replace").strip()
+    if text:
+        yield line_number, text
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+async def _iter_records(body: AsyncIterator[bytes], import_format: ImportFormat) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yields (line number, record, error) for each line of the upload.
+
+    CSV uploads must start with a header line naming the name and email columns, and
+    each record must fit on a single line.
+    """
+    header: Optional[List[str]] = None
+    async for line_number, line in _iter_lines(body):
+        try:
+            if import_format == "ndjson":
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("each line must be a JSON object")
+            else:
+                values = next(csv.reader([line]))
+                if header is None:
+                    header = [value.strip().lower() for value in values]
+                    continue
+                record = dict(zip(header, values))
+        except ValueError as e:
+            yield line_number, None, f"Malformed line: {e}"
+            continue
+        yield line_number, record, None
+
+async def import_clients(db: AsyncSession, body: AsyncIterator[bytes], import_format: ImportFormat) -> ClientImportResult:
+    """
+    Imports clients from a streamed NDJSON or CSV upload with set-based inserts.
+
+    The body is parsed as it arrives; valid rows are buffered and inserted
+    CLIENT_IMPORT_BATCH_SIZE at a time with one INSERT ... ON CONFLICT (email) DO NOTHING
+    statement and one commit per batch. An email that is already registered, or that
+    appears earlier in the same upload, is reported as a duplicate.
+
+    Args:
+        db: The asynchronous database session.
+        body: The raw request body.
+        import_format: "ndjson" or "csv".
+
+    Returns:
+        The totals and the result of every row (created, duplicate or invalid).
+    """
+    report = ClientImportResult()
+    results: List[ClientImportRowResult] = []
+    seen_emails: Set[str] = set()
+    batch: List[Tuple[int, ClientCreate]] = []
+
+    async def flush_batch() -> None:
+        created = await crud_client.insert_clients_batch(db, [client_in for _, client_in in batch])
+        for line_number, client_in in batch:
+            client_id = created.get(client_in.email)
+            if client_id is None:
+                report.duplicates += 1
+                results.append(ClientImportRowResult(line=line_number, status="duplicate", email=client_in.email))
+            else:
+                report.created += 1
+                results.append(ClientImportRowResult(line=line_number, status="created", email=client_in.email, id=client_id))
+        batch.clear()
+
+    async for line_number, record, error in _iter_records(body, import_format):
+        if record is not None:
+            try:
+                client_in = ClientCreate(name=record.get("name"), email=record.get("email"))
+            except ValidationError as e:
+                error = _format_validation_error(e)
+        if error is not None:
+            report.invalid += 1
+            raw_email = record.get("email") if record is not None else None
+            results.append(ClientImportRowResult(
+                line=line_number, status="invalid",
+                email=raw_email if isinstance(raw_email, str) else None,
+                error=error
+            ))
+            continue
+
+        if client_in.email in seen_emails:
+            report.duplicates += 1
+            results.append(ClientImportRowResult(line=line_number, status="duplicate", email=client_in.email))
+            continue
+        seen_emails.add(client_in.email)
+        batch.append((line_number, client_in))
+        if len(batch) >= settings.CLIENT_IMPORT_BATCH_SIZE:
+            await flush_batch()
+
+    if batch:
+        await flush_batch()
+    report.results = sorted(results, key=lambda row_result: row_result.line)
+    return report
\ No newline at end of file
@@ -1,78 +1,702 @@
 import httpx
 import asyncio
-from typing import Optional, List, Dict, Any
+import random
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Iterable, Set, Tuple, NamedTuple, Hashable, Coroutine
 from fastapi import HTTPException, status
-from cachetools import TTLCache
+from cachetools import LRUCache
+from pydantic import TypeAdapter
+from app.core import metrics
 from app.core.config import settings
-from app.schemas.product import ProductExternal
-from collections import defaultdict
+from app.core.responses import json_bytes
+from app.schemas.product import FavoriteProductDisplay, ProductExternal
+from app.services.cache_backends import CacheBackend, SharedCacheEntry, create_cache_backend
 
 FAKESTORE_API_PRODUCTS_URL = f"{settings.FAKESTOREAPI_URL}/products"
 
-product_id_cache = TTLCache(maxsize=200, ttl=3600)
-product_id_locks = defaultdict(asyncio.Lock)
+http_client: Optional[httpx.AsyncClient] = None
+http_pool_stats: Dict[str, int] = {
+    "requests": 0,
+    "connections_opened": 0,
+    "http2_responses": 0,
+}
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Builds the long-lived FakeStoreAPI client with the pool settings from Settings."""
+    return httpx.AsyncClient(
+        http2=settings.FAKESTORE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.FAKESTORE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.FAKESTORE_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.FAKESTORE_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.FAKESTORE_HTTP_READ_TIMEOUT_SECONDS,
+            connect=settings.FAKESTORE_HTTP_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.FAKESTORE_HTTP_POOL_TIMEOUT_SECONDS,
+        ),
+    )
+
+async def start_http_client() -> None:
+    """Opens the shared FakeStoreAPI client. Called from the application lifespan."""
+    global http_client
+    if http_client is None:
+        http_client = _create_http_client()
+
+async def close_http_client() -> None:
+    """Closes the shared FakeStoreAPI client and its pooled connections."""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared FakeStoreAPI client.
+
+    The client is normally opened by the application lifespan; it is created lazily
+    here so the service keeps working when used outside of the FastAPI app.
+    """
+    global http_client
+    if http_client is None:
+        http_client = _create_http_client()
+    return http_client
+
+async def _trace_http_connection(event_name: str, info: Dict[str, Any]) -> None:
+    """httpcore trace hook, counts every new connection opened by the pool."""
+    if event_name == "connection.connect_tcp.complete":
+        http_pool_stats["connections_opened"] += 1
+
+async def _get_from_api(url: str, endpoint: str) -> httpx.Response:
+    """
+    Sends a GET through the shared client, keeping the pool usage counters and the
+    latency and error metrics (labelled by endpoint) up to date.
+    """
+    http_pool_stats["requests"] += 1
+    started_at = time.perf_counter()
+    try:
+        response = await get_http_client().get(url, extensions={"trace": _trace_http_connection})
+    except httpx.RequestError as e:
+        metrics.product_api_errors.inc(endpoint, type(e).__name__)
+        raise
+    finally:
+        metrics.product_api_request_duration.observe(time.perf_counter() - started_at, endpoint)
+    if response.http_version == "HTTP/2":
+        http_pool_stats["http2_responses"] += 1
+    if response.status_code >= 400 and response.status_code != 404:
+        metrics.product_api_errors.inc(endpoint, str(response.status_code))
+    return response
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """
+    Returns how the FakeStoreAPI connection pool is being used.
+
+    Every request either opens a new connection or reuses a pooled one, so
+    `connections_reused` is derived from the total requests and the connections opened.
+    """
+    requests_sent = http_pool_stats["requests"]
+    connections_opened = http_pool_stats["connections_opened"]
+    return {
+        "requests": requests_sent,
+        "connections_opened": connections_opened,
+        "connections_reused": max(requests_sent - connections_opened, 0),
+        "http2_responses": http_pool_stats["http2_responses"],
+        "max_connections": settings.FAKESTORE_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.FAKESTORE_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    }
+
+CACHE_FRESH = "fresh"
+CACHE_REFRESH = "refresh"
+CACHE_STALE = "stale"
+CACHE_MISS = "miss"
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+class StaleWhileRevalidateCache:
+    """
+    Bounded LRU cache whose entries can still be served for a while after they expire.
+
+    A lookup reports the state of the entry so the caller can decide what to do:
+    CACHE_FRESH entries are returned as they are, CACHE_REFRESH entries are still fresh
+    but close to expiring (hot keys that should be refreshed ahead of time), CACHE_STALE
+    entries are expired but may be served while a background refresh runs, and
+    CACHE_MISS means there is nothing usable.
+
+    Negative results (None) get their own, usually much shorter, TTL and are never
+    served stale. A random jitter is added to the TTL so entries written together do
+    not all expire at the same moment.
+
+    on_discard, if given, is called with the key of every entry that is replaced, expires
+    or is cleared, so caches derived from the entries can drop their copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float,
+        refresh_ahead: float,
+        ttl_jitter: float = 0.0,
+        on_discard: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self.on_discard = on_discard
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.ttl_jitter = ttl_jitter
+
+    def lookup(self, key: Hashable, record: bool = True) -> Tuple[str, Any]:
+        """Returns the state and value of an entry; record=False leaves it out of the lookup metrics."""
+        state, value = self._lookup(key)
+        if record:
+            metrics.product_cache_lookups.inc(self.name, state)
+        return state, value
+
+    def _lookup(self, key: Hashable) -> Tuple[str, Any]:
+        entry: Optional[_CacheEntry] = self._entries.get(key)
+        if entry is None:
+            return CACHE_MISS, None
+
+        now = time.time()
+        if now >= entry.stale_until:
+            self._discard(key)
+            return CACHE_MISS, None
+        if now >= entry.fresh_until:
+            return CACHE_STALE, entry.value
+        if now >= entry.fresh_until - self._refresh_ahead_for(entry.value):
+            return CACHE_REFRESH, entry.value
+        return CACHE_FRESH, entry.value
+
+    def set(self, key: Hashable, value: Any) -> _CacheEntry:
+        now = time.time()
+        if value is None:
+            fresh_until = now + self.negative_ttl
+            stale_until = fresh_until
+        else:
+            fresh_until = now + self.ttl + random.uniform(0, self.ttl_jitter)
+            stale_until = fresh_until + self.stale_ttl
+        return self.set_entry(key, value, fresh_until, stale_until)
+
+    def set_entry(self, key: Hashable, value: Any, fresh_until: float, stale_until: float) -> _CacheEntry:
+        """Stores a value with explicit expiry times, e.g. an entry loaded from the shared cache."""
+        entry = _CacheEntry(value, fresh_until, stale_until)
+        if self.on_discard is not None and key in self._entries:
+            self.on_discard(key)
+        self._entries[key] = entry
+        return entry
+
+    def is_fresh_enough(self, value: Any, fresh_until: float) -> bool:
+        """Whether an entry with this value and expiry would be served without scheduling a refresh."""
+        return time.time() < fresh_until - self._refresh_ahead_for(value)
+
+    def _refresh_ahead_for(self, value: Any) -> float:
+        # Negative entries are short-lived and not worth refreshing ahead of time.
+        return 0.0 if value is None else self.refresh_ahead
+
+    def _discard(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None and self.on_discard is not None:
+            self.on_discard(key)
+
+    def clear(self) -> None:
+        if self.on_discard is not None:
+            for key in list(self._entries):
+                self.on_discard(key)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ProductDisplay(NamedTuple):
+    """The display schema of a favorite product and its JSON, serialized once."""
+    display: FavoriteProductDisplay
+    json: bytes
+    # The ProductExternal the display was built from, or None for a products_ref row.
+    source: Optional[ProductExternal]
+
+# Second tier on top of the product caches: display-ready favorites and their JSON.
+# Displays built from a cached ProductExternal are keyed by product id and dropped together
+# with the product_id_cache entry; displays built from products_ref rows are keyed by
+# (product id, fetched_at), so a refreshed row never matches an old display.
+PRODUCT_DISPLAY_CACHE_NAME = "product_display_cache"
+product_display_cache: LRUCache = LRUCache(maxsize=settings.PRODUCT_DISPLAY_CACHE_MAXSIZE)
+
+def _forget_product_display(product_id: Hashable) -> None:
+    product_display_cache.pop(product_id, None)
+
+product_id_cache = StaleWhileRevalidateCache(
+    name="product_id_cache",
+    maxsize=settings.PRODUCT_CACHE_MAXSIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+    negative_ttl=settings.PRODUCT_CACHE_NEGATIVE_TTL_SECONDS,
+    stale_ttl=settings.PRODUCT_CACHE_STALE_TTL_SECONDS,
+    refresh_ahead=settings.PRODUCT_CACHE_REFRESH_AHEAD_SECONDS,
+    ttl_jitter=settings.PRODUCT_CACHE_TTL_JITTER_SECONDS,
+    on_discard=_forget_product_display,
+)
+product_id_inflight: Dict[int, asyncio.Future] = {}
+pending_product_ids: Set[int] = set()
+product_batch_task: Optional[asyncio.Task] = None
+
+ALL_PRODUCTS_CACHE_KEY = "all_products_list"
+all_products_cache = StaleWhileRevalidateCache(
+    name="all_products_cache",
+    maxsize=1,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+    negative_ttl=settings.PRODUCT_CACHE_NEGATIVE_TTL_SECONDS,
+    stale_ttl=settings.PRODUCT_CACHE_STALE_TTL_SECONDS,
+    refresh_ahead=settings.PRODUCT_CACHE_REFRESH_AHEAD_SECONDS,
+    ttl_jitter=settings.PRODUCT_CACHE_TTL_JITTER_SECONDS,
+)
+all_products_lock = asyncio.Lock()
+all_products_refresh_task: Optional[asyncio.Task] = None
+
+background_tasks: Set[asyncio.Task] = set()
+
+shared_cache_backend: Optional[CacheBackend] = None
+_product_list_adapter = TypeAdapter(List[ProductExternal])
+
+def _run_in_background(coro: Coroutine) -> asyncio.Task:
+    """Starts a background task and keeps a reference to it until it finishes."""
+    task = asyncio.get_running_loop().create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_finish_background_task)
+    return task
+
+def _finish_background_task(task: asyncio.Task) -> None:
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background product cache refresh failed: {task.exception()}")
+
+def _product_cache_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def _dump_product(product: Optional[ProductExternal]) -> bytes:
+    return b"null" if product is None else product.model_dump_json().encode()
+
+def _load_product(data: bytes) -> Optional[ProductExternal]:
+    return None if data == b"null" else ProductExternal.model_validate_json(data)
+
+async def start_shared_cache() -> None:
+    """
+    Opens the shared cache backend configured in Settings and warm-loads it into memory.
+
+    Every entry still inside its stale window is copied to the in-process caches with its
+    original expiry times, so a new worker can answer from the cache without any upstream call.
+    """
+    global shared_cache_backend
+    shared_cache_backend = create_cache_backend(
+        settings.PRODUCT_CACHE_SHARED_BACKEND,
+        settings.PRODUCT_CACHE_SQLITE_PATH,
+    )
+    if shared_cache_backend is None:
+        return
+
+    try:
+        entries = await shared_cache_backend.load_all()
+    except Exception as e:
+        print(f"Error warm-loading the shared product cache: {e}")
+        return
+
+    for entry in entries:
+        if entry.key == ALL_PRODUCTS_CACHE_KEY:
+            all_products_cache.set_entry(
+                ALL_PRODUCTS_CACHE_KEY, _product_list_adapter.validate_json(entry.value),
+                entry.fresh_until, entry.stale_until
+            )
+        elif entry.key.startswith("product:"):
+            product_id_cache.set_entry(
+                int(entry.key.split(":", 1)[1]), _load_product(entry.value),
+                entry.fresh_until, entry.stale_until
+            )
+
+async def close_shared_cache() -> None:
+    global shared_cache_backend
+    if shared_cache_backend is not None:
+        await shared_cache_backend.close()
+        shared_cache_backend = None
+
+async def _write_to_shared_cache(entries: List[SharedCacheEntry]) -> None:
+    try:
+        await shared_cache_backend.set_many(entries)
+    except Exception as e:
+        print(f"Error writing to the shared product cache: {e}")
+
+def _cache_products(products: Dict[int, Optional[ProductExternal]]) -> None:
+    """Stores freshly fetched products in memory and writes them through to the shared cache."""
+    shared_entries: List[SharedCacheEntry] = []
+    for product_id, product in products.items():
+        entry = product_id_cache.set(product_id, product)
+        shared_entries.append(SharedCacheEntry(
+            _product_cache_key(product_id), _dump_product(product), entry.fresh_until, entry.stale_until
+        ))
+    if shared_cache_backend is not None and shared_entries:
+        _run_in_background(_write_to_shared_cache(shared_entries))
+
+async def _read_products_from_shared_cache(product_ids: List[int]) -> Dict[int, Optional[ProductExternal]]:
+    """Returns the products another worker already fetched and that are still fresh, caching them in memory."""
+    if shared_cache_backend is None:
+        return {}
+    try:
+        entries = await shared_cache_backend.get_many([_product_cache_key(product_id) for product_id in product_ids])
+    except Exception as e:
+        print(f"Error reading from the shared product cache: {e}")
+        return {}
+
+    products: Dict[int, Optional[ProductExternal]] = {}
+    for product_id in product_ids:
+        entry = entries.get(_product_cache_key(product_id))
+        if entry is None:
+            continue
+        product = _load_product(entry.value)
+        if product_id_cache.is_fresh_enough(product, entry.fresh_until):
+            product_id_cache.set_entry(product_id, product, entry.fresh_until, entry.stale_until)
+            products[product_id] = product
+    return products
 
 async def _fetch_product_data_from_api(product_id: int) -> Optional[ProductExternal]:
     """Internal function to actually fetch and parse a single product from the API."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{FAKESTORE_API_PRODUCTS_URL}/{product_id}")
-            response.raise_for_status()
-            data = response.json()
-            return ProductExternal(**data)
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                return None
-            print(f"HTTP error fetching product {product_id}: {e.response.status_code} - {e.response.text}")
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Error from external product API: {e.response.text}"
-            )
-        except httpx.RequestError as e:
-            print(f"Request error fetching product {product_id}: {e}")
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External product API is unavailable.")
-        except Exception as e:
-            print(f"Generic error fetching product {product_id}: {e}")
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process product data from external API. FakeStoreAPI has a limit of 20 products.")
+    try:
+        response = await _get_from_api(f"{FAKESTORE_API_PRODUCTS_URL}/{product_id}", "product")
+        response.raise_for_status()
+        data = response.json()
+        return ProductExternal(**data)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return None
+        print(f"HTTP error fetching product {product_id}: {e.response.status_code} - {e.response.text}")
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Error from external product API: {e.response.text}"
+        )
+    except httpx.RequestError as e:
+        print(f"Request error fetching product {product_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External product API is unavailable.")
+    except Exception as e:
+        print(f"Generic error fetching product {product_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process product data from external API. FakeStoreAPI has a limit of 20 products.")
+
+def _consume_future_exception(future: asyncio.Future) -> None:
+    """Marks a failed single-flight future as retrieved when every waiter has gone away."""
+    if not future.cancelled():
+        future.exception()
+
+def _request_products(product_ids: Iterable[int]) -> Dict[int, asyncio.Future]:
+    """
+    Returns one single-flight future per product id.
+
+    Ids already being resolved share the existing future; the others are queued for
+    the next batch, which is flushed after PRODUCT_BATCH_WINDOW_MS so that misses from
+    every concurrent request are resolved together.
+    """
+    global product_batch_task
+    loop = asyncio.get_running_loop()
+    futures: Dict[int, asyncio.Future] = {}
+    for product_id in product_ids:
+        future = product_id_inflight.get(product_id)
+        if future is None:
+            future = loop.create_future()
+            future.add_done_callback(_consume_future_exception)
+            product_id_inflight[product_id] = future
+            pending_product_ids.add(product_id)
+        futures[product_id] = future
+
+    if pending_product_ids and product_batch_task is None:
+        product_batch_task = loop.create_task(_flush_product_batch())
+    return futures
+
+async def _resolve_product_batch(product_ids: List[int]) -> Dict[int, Any]:
+    """
+    Resolves a batch of product ids with as few upstream calls as possible.
+
+    Products that another worker already stored in the shared cache are used first. When
+    at least PRODUCT_BATCH_CATALOG_THRESHOLD ids are still missing, the whole catalog is
+    used instead and every product in it is cached; otherwise each id is fetched on its
+    own. The cached catalog is only reused while fresh, since its products get a full new
+    TTL. Ids absent from the catalog resolve to None, the same as a 404. Per-id failures
+    are returned as the exception instead of a value.
+    """
+    results: Dict[int, Any] = await _read_products_from_shared_cache(product_ids)
+    missing_ids = [product_id for product_id in product_ids if product_id not in results]
+    if not missing_ids:
+        return results
+
+    if len(missing_ids) >= settings.PRODUCT_BATCH_CATALOG_THRESHOLD:
+        state, products_list = all_products_cache.lookup(ALL_PRODUCTS_CACHE_KEY)
+        if state != CACHE_FRESH:
+            products_list = await _load_all_products()
+        fetched: Dict[int, Optional[ProductExternal]] = {product.id: product for product in products_list}
+        fetched.update({product_id: None for product_id in missing_ids if product_id not in fetched})
+        _cache_products(fetched)
+        results.update({product_id: fetched[product_id] for product_id in missing_ids})
+        return results
+
+    outcomes = await asyncio.gather(
+        *(_fetch_product_data_from_api(product_id) for product_id in missing_ids),
+        return_exceptions=True
+    )
+    results.update(zip(missing_ids, outcomes))
+    _cache_products({
+        product_id: outcome for product_id, outcome in zip(missing_ids, outcomes)
+        if not isinstance(outcome, Exception)
+    })
+    return results
+
+def _take_pending_batch() -> List[int]:
+    global product_batch_task
+    batch = list(pending_product_ids)
+    pending_product_ids.clear()
+    product_batch_task = None
+    return batch
+
+async def _flush_product_batch() -> None:
+    """Waits for the batching window, then resolves and frees every queued single-flight entry."""
+    batch: Optional[List[int]] = None
+    results: Dict[int, Any] = {}
+    try:
+        await asyncio.sleep(settings.PRODUCT_BATCH_WINDOW_MS / 1000)
+        batch = _take_pending_batch()
+        results = await _resolve_product_batch(batch)
+    except Exception as e:
+        results = {product_id: e for product_id in batch or ()}
+    finally:
+        # Also runs when the flush is cancelled (e.g. at shutdown), so no id is left in
+        # product_id_inflight with a future that nobody will ever settle.
+        if batch is None:
+            batch = _take_pending_batch()
+        for product_id in batch:
+            future = product_id_inflight.pop(product_id)
+            if product_id not in results:
+                future.set_exception(HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Product lookup was cancelled."
+                ))
+                continue
+            result = results[product_id]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+def _refresh_products_in_background(product_ids: List[int]) -> None:
+    """
+    Queues stale or about-to-expire products on the batch resolver without waiting for it.
+
+    Ids already being resolved are not queued again, and a failed refresh leaves the
+    current entry in place so it keeps being served until its stale window ends.
+    """
+    _request_products(product_id for product_id in product_ids if product_id not in product_id_inflight)
 
 async def get_cached_product_by_id(product_id: int) -> Optional[ProductExternal]:
-    if product_id in product_id_cache:
-        return product_id_cache[product_id]
+    """
+    Returns a single product from the cache, joining the batch resolver on a miss.
 
-    async with product_id_locks[product_id]:
-        if product_id in product_id_cache:
-            return product_id_cache[product_id]
+    Stale or about-to-expire entries are returned right away and refreshed in the background.
 
-        product_data = await _fetch_product_data_from_api(product_id)
-        product_id_cache[product_id] = product_data
-        return product_data
+    Returns:
+        The ProductExternal, or None if the product does not exist in the external API.
 
-all_products_cache = TTLCache(maxsize=1, ttl=3600)
-all_products_lock = asyncio.Lock()
+    Raises:
+        HTTPException: If the external API fails while resolving the product.
+    """
+    state, cached_product = product_id_cache.lookup(product_id)
+    if state != CACHE_MISS:
+        if state != CACHE_FRESH:
+            _refresh_products_in_background([product_id])
+        return cached_product
+
+    future = _request_products([product_id])[product_id]
+    return await asyncio.shield(future)
+
+async def get_cached_products_by_ids(product_ids: Iterable[int]) -> Dict[int, Optional[ProductExternal]]:
+    """
+    Returns many products at once, coalescing cache misses across concurrent requests.
+
+    Stale or about-to-expire entries are returned right away and refreshed in the background.
+
+    Args:
+        product_ids: The ids of the products to resolve. Duplicates are resolved once.
+
+    Returns:
+        A dict mapping each product id to its ProductExternal, or to None when the product
+        does not exist in the external API. Ids whose resolution failed are left out and
+        the error is logged.
+    """
+    products: Dict[int, Optional[ProductExternal]] = {}
+    missing_ids: List[int] = []
+    expiring_ids: List[int] = []
+    for product_id in dict.fromkeys(product_ids):
+        state, cached_product = product_id_cache.lookup(product_id)
+        if state == CACHE_MISS:
+            missing_ids.append(product_id)
+            continue
+        if state != CACHE_FRESH:
+            expiring_ids.append(product_id)
+        products[product_id] = cached_product
+
+    if expiring_ids:
+        _refresh_products_in_background(expiring_ids)
+    if not missing_ids:
+        return products
+
+    futures = _request_products(missing_ids)
+    outcomes = await asyncio.gather(
+        *(asyncio.shield(future) for future in futures.values()),
+        return_exceptions=True
+    )
+    for product_id, outcome in zip(futures, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Error fetching details for product_id {product_id}: {outcome}")
+            continue
+        products[product_id] = outcome
+    return products
+
+def _display_from_product(product: ProductExternal) -> FavoriteProductDisplay:
+    # The product was already validated when it was fetched, so it is not validated again.
+    return FavoriteProductDisplay.model_construct(
+        id=product.id,
+        title=product.title,
+        image=product.image,
+        price=product.price,
+        review=product.rating.rate if product.rating else None,
+        review_count=product.rating.count if product.rating else None
+    )
+
+def get_product_display(product: ProductExternal) -> ProductDisplay:
+    """
+    Returns the favorite display of a product resolved by this service, with its JSON.
+
+    The display is built and serialized once per cached product, and reused until the
+    product_id_cache entry it was built from is replaced, expires or is cleared.
+
+    Args:
+        product: A product returned by get_cached_product_by_id or get_cached_products_by_ids.
+
+    Returns:
+        A ProductDisplay with the FavoriteProductDisplay and its serialized JSON.
+    """
+    product_display = product_display_cache.get(product.id)
+    if product_display is not None and product_display.source is product:
+        metrics.product_cache_lookups.inc(PRODUCT_DISPLAY_CACHE_NAME, CACHE_FRESH)
+        return product_display
+
+    metrics.product_cache_lookups.inc(PRODUCT_DISPLAY_CACHE_NAME, CACHE_MISS)
+    display = _display_from_product(product)
+    product_display = ProductDisplay(display, json_bytes(display), product)
+    product_display_cache[product.id] = product_display
+    return product_display
+
+def get_stored_product_display(
+    product_id: int, fetched_at: datetime, build: Callable[[], FavoriteProductDisplay]
+) -> ProductDisplay:
+    """
+    Returns the favorite display of a product stored in products_ref, with its JSON.
+
+    Args:
+        product_id: The id of the product.
+        fetched_at: When the stored fields were fetched; part of the cache key, so a
+                    refreshed row gets a new display.
+        build: Builds the display from the stored fields. Only called on a cache miss.
+
+    Returns:
+        A ProductDisplay with the FavoriteProductDisplay and its serialized JSON.
+    """
+    key = (product_id, fetched_at)
+    product_display = product_display_cache.get(key)
+    if product_display is not None:
+        metrics.product_cache_lookups.inc(PRODUCT_DISPLAY_CACHE_NAME, CACHE_FRESH)
+        return product_display
+
+    metrics.product_cache_lookups.inc(PRODUCT_DISPLAY_CACHE_NAME, CACHE_MISS)
+    display = build()
+    product_display = ProductDisplay(display, json_bytes(display), None)
+    product_display_cache[key] = product_display
+    return product_display
 
 async def _fetch_all_products_data_from_api() -> List[ProductExternal]:
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(FAKESTORE_API_PRODUCTS_URL)
-            response.raise_for_status()
-            products_data = response.json()
-            return [ProductExternal(**p_data) for p_data in products_data]
-        except httpx.RequestError as e:
-            print(f"Request error fetching all products: {e}")
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External product API is unavailable.")
-        except Exception as e:
-            print(f"Generic error fetching all products: {e}")
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process product list from external API.")
+    try:
+        response = await _get_from_api(FAKESTORE_API_PRODUCTS_URL, "catalog")
+        response.raise_for_status()
+        products_data = response.json()
+        return [ProductExternal(**p_data) for p_data in products_data]
+    except httpx.RequestError as e:
+        print(f"Request error fetching all products: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="External product API is unavailable.")
+    except Exception as e:
+        print(f"Generic error fetching all products: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process product list from external API.")
 
-async def get_cached_all_products() -> List[ProductExternal]:
-    cache_key = "all_products_list"
-    if cache_key in all_products_cache:
-        return all_products_cache[cache_key]
+async def _read_all_products_from_shared_cache() -> Optional[List[ProductExternal]]:
+    """Returns the catalog if another worker already stored a fresh one in the shared cache."""
+    if shared_cache_backend is None:
+        return None
+    try:
+        entries = await shared_cache_backend.get_many([ALL_PRODUCTS_CACHE_KEY])
+    except Exception as e:
+        print(f"Error reading from the shared product cache: {e}")
+        return None
 
+    entry = entries.get(ALL_PRODUCTS_CACHE_KEY)
+    if entry is None or not all_products_cache.is_fresh_enough(entry.value, entry.fresh_until):
+        return None
+    products_list = _product_list_adapter.validate_json(entry.value)
+    all_products_cache.set_entry(ALL_PRODUCTS_CACHE_KEY, products_list, entry.fresh_until, entry.stale_until)
+    return products_list
+
+def _store_all_products(products_list: List[ProductExternal]) -> None:
+    entry = all_products_cache.set(ALL_PRODUCTS_CACHE_KEY, products_list)
+    if shared_cache_backend is not None:
+        _run_in_background(_write_to_shared_cache([SharedCacheEntry(
+            ALL_PRODUCTS_CACHE_KEY, _product_list_adapter.dump_json(products_list),
+            entry.fresh_until, entry.stale_until
+        )]))
+
+async def refresh_all_products() -> List[ProductExternal]:
+    """
+    Fetches the catalog from the API regardless of the cache, and stores the result in it.
+
+    Used by jobs that must work with the current upstream data, such as the catalog sync.
+    """
+    async with all_products_lock:
+        products_list = await _fetch_all_products_data_from_api()
+        _store_all_products(products_list)
+    _cache_products({product.id: product for product in products_list})
+    return products_list
+
+async def _load_all_products() -> List[ProductExternal]:
+    """Fetches the catalog from the API, unless another caller or worker refreshed it while we waited on the lock."""
     async with all_products_lock:
-        if cache_key in all_products_cache:
-            return all_products_cache[cache_key]
+        state, products_list = all_products_cache.lookup(ALL_PRODUCTS_CACHE_KEY, record=False)
+        if state == CACHE_FRESH:
+            return products_list
+
+        shared_products_list = await _read_all_products_from_shared_cache()
+        if shared_products_list is not None:
+            return shared_products_list
 
         products_list = await _fetch_all_products_data_from_api()
-        all_products_cache[cache_key] = products_list
-        return products_list
\ No newline at end of file
+        _store_all_products(products_list)
+        return products_list
+
+async def get_cached_all_products() -> List[ProductExternal]:
+    """
+    Returns the whole product catalog.
+
+    A stale or about-to-expire catalog is returned right away while a single background
+    task fetches a new one.
+    """
+    global all_products_refresh_task
+    state, products_list = all_products_cache.lookup(ALL_PRODUCTS_CACHE_KEY)
+    if state == CACHE_MISS:
+        return await _load_all_products()
+
+    if state != CACHE_FRESH and (all_products_refresh_task is None or all_products_refresh_task.done()):
+        all_products_refresh_task = _run_in_background(_load_all_products())
+    return products_list
\ No newline at end of file
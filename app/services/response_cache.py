@@ -0,0 +1,94 @@
+import hashlib
+import uuid
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+from cachetools import TTLCache
+from fastapi import Response, status
+from app.core.config import settings
+
+# Latest known version of each client. Changes made through this process update it right
+# away; changes made by other workers are seen once the entry expires.
+client_versions: TTLCache = TTLCache(
+    maxsize=settings.CLIENT_RESPONSE_CACHE_MAXSIZE,
+    ttl=settings.CLIENT_VERSION_TTL_SECONDS
+)
+# Rendered JSON bodies, keyed by (kind, client_id, version). The TTL bounds how long a
+# body can hold product fields that changed in products_ref without a client change.
+rendered_responses: TTLCache = TTLCache(
+    maxsize=settings.CLIENT_RESPONSE_CACHE_MAXSIZE,
+    ttl=settings.CLIENT_RESPONSE_CACHE_TTL_SECONDS
+)
+
+def set_client_version(client_id: uuid.UUID, version: int) -> None:
+    """Records the version of a client, never moving it backwards."""
+    if version >= client_versions.get(client_id, 0):
+        client_versions[client_id] = version
+
+def forget_client(client_id: uuid.UUID) -> None:
+    client_versions.pop(client_id, None)
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a rendered body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Checks an If-None-Match header against an ETag, using the weak comparison the header requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def _respond(etag: str, body: bytes, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def conditional_client_response(
+    kind: Hashable,
+    client_id: uuid.UUID,
+    if_none_match: Optional[str],
+    render: Callable[[], Awaitable[Tuple[int, bytes]]],
+    load_version: Callable[[], Awaitable[Optional[int]]]
+) -> Response:
+    """
+    Serves a read of a client's data with an ETag, from the cache when the version is known.
+
+    When the client's version is known and a body for it is cached, the response (or a
+    304 if the request's If-None-Match matches) is produced without touching the database
+    or the product service. When the version entry has expired, load_version() reads it
+    with a single primary key lookup, so a body cached for that version is still served
+    without rendering. Otherwise render() is awaited for the current version and JSON
+    body, which are cached for the next requests.
+
+    Args:
+        kind: Identifies which representation of the client is being served.
+        client_id: The UUID of the client.
+        if_none_match: The If-None-Match header of the request, if any.
+        render: Loads the client and returns its current version and rendered JSON body.
+        load_version: Returns the client's current version, or None if it does not exist.
+
+    Returns:
+        A 200 response with the body and its ETag, or a 304 response.
+    """
+    version = client_versions.get(client_id)
+    if version is None:
+        version = await load_version()
+        if version is not None:
+            set_client_version(client_id, version)
+    if version is not None:
+        cached = rendered_responses.get((kind, client_id, version))
+        if cached is not None:
+            return _respond(*cached, if_none_match)
+
+    version, body = await render()
+    etag = make_etag(body)
+    set_client_version(client_id, version)
+    rendered_responses[(kind, client_id, version)] = (etag, body)
+    return _respond(etag, body, if_none_match)
@@ -0,0 +1,57 @@
+import asyncio
+import zlib
+from typing import Awaitable, Callable, List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionFactory
+
+DbJob = Callable[[AsyncSession], Awaitable[object]]
+
+periodic_tasks: List[asyncio.Task] = []
+
+async def _run_db_job_once(name: str, job: DbJob) -> None:
+    """
+    Runs a job in its own session, unless another worker is already running it.
+
+    A transaction-level advisory lock keyed by the job name makes sure only one of the
+    uvicorn workers runs each job at a time; the lock is released when the job commits.
+    """
+    async with AsyncSessionFactory() as db:
+        lock_acquired = await db.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": zlib.crc32(name.encode())}
+        )
+        if not lock_acquired:
+            return
+        try:
+            await job(db)
+        finally:
+            await db.rollback()
+
+async def _run_periodically(name: str, interval_seconds: float, job: DbJob) -> None:
+    while True:
+        try:
+            await _run_db_job_once(name, job)
+        except Exception as e:
+            print(f"Periodic job {name} failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+def start_periodic_db_job(name: str, interval_seconds: float, job: DbJob) -> None:
+    """
+    Starts running a database job right away and then every `interval_seconds`.
+
+    Args:
+        name: A unique job name, also used as the advisory lock key.
+        interval_seconds: Time between runs. A value of 0 or less disables the job.
+        job: A coroutine function that receives a fresh AsyncSession.
+    """
+    if interval_seconds <= 0:
+        return
+    periodic_tasks.append(asyncio.get_running_loop().create_task(_run_periodically(name, interval_seconds, job)))
+
+async def stop_periodic_jobs() -> None:
+    for task in periodic_tasks:
+        task.cancel()
+    await asyncio.gather(*periodic_tasks, return_exceptions=True)
+    periodic_tasks.clear()
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Compares two result files written by benchmarks.run.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+"""
+import argparse
+import json
+
+COMPARED_FIELDS = ("throughput_rps", "cpu_ms_per_request", "p50_ms", "p95_ms", "p99_ms")
+
+def _change(baseline: float, candidate: float) -> str:
+    if not baseline:
+        return "n/a"
+    return f"{(candidate - baseline) / baseline * 100:+.1f}%"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline = json.load(baseline_file)
+        candidate = json.load(candidate_file)
+
+    print(f"baseline  {baseline['meta'].get('git_commit')}")
+    print(f"candidate {candidate['meta'].get('git_commit')}")
+    print(f"{'scenario':28}" + "".join(f"{field:>28}" for field in COMPARED_FIELDS))
+    for name, candidate_result in candidate["scenarios"].items():
+        baseline_result = baseline["scenarios"].get(name)
+        if baseline_result is None:
+            continue
+        cells = [
+            f"{baseline_result[field]} -> {candidate_result[field]} ({_change(baseline_result[field], candidate_result[field])})"
+            if field in baseline_result and field in candidate_result else "n/a"
+            for field in COMPARED_FIELDS
+        ]
+        print(f"{name:28}" + "".join(f"{cell:>28}" for cell in cells))
+
+if __name__ == "__main__":
+    main()
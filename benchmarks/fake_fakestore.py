@@ -0,0 +1,91 @@
+import asyncio
+import random
+import socket
+import threading
+import time
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+def _product(product_id: int) -> Dict:
+    return {
+        "id": product_id,
+        "title": f"Benchmark product {product_id}",
+        "price": round(5 + product_id * 1.25, 2),
+        "description": "Product served by the local FakeStoreAPI stand-in.",
+        "category": "benchmark",
+        "image": f"https://fakestoreapi.com/img/{product_id}.jpg",
+        "rating": {"rate": 4.0, "count": 100 + product_id},
+    }
+
+def create_fake_fakestore(latency_ms: float, error_rate: float, catalog_size: int) -> FastAPI:
+    """
+    Builds an app that mimics the two FakeStoreAPI endpoints used by product_service.
+
+    Every response waits latency_ms, fails with a 500 with probability error_rate, and the
+    catalog holds products 1 to catalog_size (other ids answer 404). The number of calls to
+    each endpoint is served at /calls.
+    """
+    app = FastAPI()
+    calls = {"product": 0, "catalog": 0}
+
+    async def simulate_upstream() -> None:
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            raise HTTPException(status_code=500, detail="Simulated upstream error")
+
+    @app.get("/products")
+    async def read_products():
+        calls["catalog"] += 1
+        await simulate_upstream()
+        return [_product(product_id) for product_id in range(1, catalog_size + 1)]
+
+    @app.get("/products/{product_id}")
+    async def read_product(product_id: int):
+        calls["product"] += 1
+        await simulate_upstream()
+        if not 1 <= product_id <= catalog_size:
+            raise HTTPException(status_code=404)
+        return _product(product_id)
+
+    @app.get("/calls")
+    async def read_calls():
+        return calls
+
+    return app
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+class FakeFakeStoreServer:
+    """Runs the fake FakeStoreAPI with uvicorn in a background thread on a free local port."""
+
+    def __init__(self, latency_ms: float = 50.0, error_rate: float = 0.0, catalog_size: int = 20):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(
+            create_fake_fakestore(latency_ms, error_rate, catalog_size),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            access_log=False,
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "FakeFakeStoreServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("The fake FakeStoreAPI did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,10 @@
+-- Stores the display fields of each referenced product, so favorites can be
+-- listed from the database without calling the FakeStoreAPI.
+ALTER TABLE products_ref
+    ADD COLUMN IF NOT EXISTS title VARCHAR,
+    ADD COLUMN IF NOT EXISTS price DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS image VARCHAR,
+    ADD COLUMN IF NOT EXISTS category VARCHAR,
+    ADD COLUMN IF NOT EXISTS rating_rate DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS rating_count INTEGER,
+    ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,2 @@
+-- Supports keyset pagination of clients sorted by name, with id as the tie-breaker.
+CREATE INDEX IF NOT EXISTS ix_clients_name_id ON clients (name, id);
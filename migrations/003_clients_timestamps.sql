@@ -0,0 +1,6 @@
+-- Tracks when each client (or its favorites list) last changed, for incremental exports.
+ALTER TABLE clients
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS ix_clients_updated_at ON clients (updated_at);
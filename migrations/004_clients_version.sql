@@ -0,0 +1,3 @@
+-- Per-client version, bumped on every change to the client or its favorites list, used for ETags.
+ALTER TABLE clients
+    ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,18 @@
+-- Favorite counters kept up to date by the favorites writes, for the analytics endpoints.
+ALTER TABLE products_ref
+    ADD COLUMN IF NOT EXISTS favorite_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE clients
+    ADD COLUMN IF NOT EXISTS favorite_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE products_ref
+SET favorite_count = counts.favorite_count
+FROM (SELECT product_ref_id, count(*) AS favorite_count FROM client_favorite_products GROUP BY product_ref_id) AS counts
+WHERE products_ref.id = counts.product_ref_id;
+
+UPDATE clients
+SET favorite_count = counts.favorite_count
+FROM (SELECT client_id, count(*) AS favorite_count FROM client_favorite_products GROUP BY client_id) AS counts
+WHERE clients.id = counts.client_id;
+
+CREATE INDEX IF NOT EXISTS ix_products_ref_favorite_count_id ON products_ref (favorite_count DESC, id);
+CREATE INDEX IF NOT EXISTS ix_clients_favorite_count_id ON clients (favorite_count DESC, id);
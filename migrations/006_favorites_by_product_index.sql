@@ -0,0 +1,4 @@
+-- Lets the clients who favorited a product be read (and paged by client id) without a full scan.
+-- Built CONCURRENTLY so writes to client_favorite_products are not blocked; run it outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_client_favorite_products_product_ref_id_client_id
+    ON client_favorite_products (product_ref_id, client_id);
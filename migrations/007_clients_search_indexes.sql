@@ -0,0 +1,11 @@
+-- Indexes for GET /clients/search. Built CONCURRENTLY so writes to clients are not blocked; run it outside a transaction.
+
+-- Case-insensitive email prefix search, paged by (lower(email), id). The "C" collation orders by
+-- code point, which lets a prefix be searched as a plain index range.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_clients_email_lower_id
+    ON clients ((lower(email) COLLATE "C"), id);
+
+-- Fuzzy (trigram) name search, ordered by similarity with the GiST index's nearest-neighbour scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_clients_name_trgm
+    ON clients USING gist (lower(name) gist_trgm_ops);
@@ -0,0 +1,25 @@
+-- Outbox of the changes to clients and their favorites, read by the change feed (GET /api/v1/changes).
+-- Rows are written in the same transaction as the change; a statement-level trigger sends a
+-- NOTIFY on the client_changes channel, delivered when that transaction commits.
+CREATE TABLE IF NOT EXISTS client_changes (
+    id BIGSERIAL PRIMARY KEY,
+    client_id UUID NOT NULL,
+    type VARCHAR NOT NULL,
+    version INTEGER,
+    data JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_client_changes_created_at ON client_changes (created_at);
+
+CREATE OR REPLACE FUNCTION notify_client_changes() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('client_changes', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS client_changes_notify ON client_changes;
+CREATE TRIGGER client_changes_notify
+    AFTER INSERT ON client_changes
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_client_changes();